@@ -1,14 +1,23 @@
 __all__ = ["getD", "getB",
-           "getStrain", "getCellsStrain",
+           "getStrain", "getCellsStrain", "getCellsStress", 
+           "getPrincipalStress", "getVonMises", "getCellsResults",
            "applyCP", 
-           "getK", "getM", "getF", 
-           "horzBorder", "vertBorder", "applyNeiman", "setFNeiman", "fixAxis"]
+           "StiffnessFactors", "getStiffnessFactors",
+           "getK", "getM", "getLumpedM", "getF", 
+           "horzBorder", "vertBorder", "applyNeiman", "setFNeiman", "fixAxis", "fixDOF", "fixSparse"]
            
 
+import warnings
+
 import numpy as np
-import scipy.sparse.linalg as sp
 
-from .formFunc import getDNMatrix
+from functools import partial
+
+from scipy.sparse import issparse, kron, diags
+
+from .kernel import getLocalFactors, getLocalS
+from .quadrature import getQuadrature
+from .solvers import pcg, factorize
 
 
 # Упругие свойства:
@@ -60,89 +69,292 @@ def getStrain(U, B):
 def getCellsStrain(mesh, U):
     """
     Расчет деформаций на элементах сетки по узловым значениям перемещений U
+    
+    U задается в виде np.array(shape=(N, 2)) или np.array(shape=(2N, )),
+    или блоком перемещений np.array(shape=(2N, k)) (например, для нескольких
+    случаев нагружения или шагов по времени)
+    
+    Возвращает np.array(shape=(M, 3)) или np.array(shape=(M, 3, k)) для блока
+    деформаций (exx, eyy, exy + eyx) на элементах
     """
-
-    return np.array([getStrain(U[cell], getB(coords, S))
-                    for cell, coords, S in zip(mesh.cells, mesh.coords, mesh.S)])
+    
+    U = np.asarray(U, dtype=np.double)
+    isBlock = U.shape[0] == 2*mesh.N and U.ndim == 2
+    
+    mesh.computeB()
+    U = U.reshape(mesh.N, 2, -1)
+    dU = U[mesh.cells[:, 0:2]] - U[mesh.cells[:, 2:4]]
+    (exx, exy), (eyx, eyy) = np.einsum('mij,mjdk->idmk', mesh.B, dU)
+    
+    strain = np.stack((exx, eyy, exy + eyx), axis=1)
+    return strain if isBlock else strain[..., 0]
+    
+def getCellsStress(mesh, U, D):
+    """
+    Расчет напряжений (sxx, syy, sxy) на элементах сетки 
+    по узловым значениям перемещений U и матрице закона Гука D
+    (форматы U и результата см. в getCellsStrain)
+    """
+    
+    return np.einsum('ij,mj...->mi...', D, getCellsStrain(mesh, U))
+    
+def getPrincipalStress(stress):
+    """
+    Расчет главных напряжений (s1, s2), s1 >= s2,
+    по напряжениям stress : shape=(M, 3, ...) (см. getCellsStress)
+    
+    Возвращает np.array(shape=(M, 2, ...))
+    """
+    
+    sxx, syy, sxy = np.moveaxis(stress, 1, 0)
+    mean = (sxx + syy)/2
+    radius = np.hypot((sxx - syy)/2, sxy)
+    return np.stack((mean + radius, mean - radius), axis=1)
+    
+def getVonMises(stress):
+    """
+    Расчет эквивалентных напряжений по Мизесу для плоского напряженного состояния
+    по напряжениям stress : shape=(M, 3, ...) (см. getCellsStress)
+    
+    Возвращает np.array(shape=(M, ...))
+    """
+    
+    sxx, syy, sxy = np.moveaxis(stress, 1, 0)
+    return np.sqrt(sxx*sxx - sxx*syy + syy*syy + 3*sxy*sxy)
+    
+def getCellsResults(mesh, U, D):
+    """
+    Расчет всех результатов на элементах сетки по узловым значениям 
+    перемещений U (форматы U см. в getCellsStrain)
+    
+    Возвращает кортеж (strain, stress, principal, vonMises)
+    (см. getCellsStrain, getCellsStress, getPrincipalStress, getVonMises)
+    """
+    
+    strain = getCellsStrain(mesh, U)
+    stress = np.einsum('ij,mj...->mi...', D, strain)
+    return strain, stress, getPrincipalStress(stress), getVonMises(stress)
 
 
 # Метод согласованных результантов для расчета деформаций и напряжений в узлах сетки:
 
-def applyCP(mesh, values):
+def applyCP(mesh, values, sparse=True, method='direct', precond='jacobi', tol=1e-8):
     """
     Методом согласованных результантов вычисляет значения в узлах сетки mesh
-    на основе средних по элементам значений values
+    на основе средних по элементам значений values : shape=(M, )
+    или сразу для блока полей values : shape=(M, k) (результат shape=(N, k))
+    
+    Если sparse = True (default), то используется разреженная матрица площадей сетки
+    Если method = 'direct' (default), то система решается для всех полей
+    с кэшируемым разложением матрицы площадей (см. FEM.solvers.factorize),
+    так что повторные вызовы для той же сетки не требуют нового разложения
+    Если method = 'cg', то система решается методом сопряженных градиентов 
+    с предобуславливателем precond и относительной точностью tol (см. FEM.solvers.pcg)
     """
     
-    R = np.zeros(shape=(mesh.N, ), dtype=np.double)
-    for value, cell, S, trS in zip(values, mesh.cells, mesh.S, mesh.trS):
-        R[cell] += (S + trS)*value
+    values = np.asarray(values, dtype=np.double)
+    block = values.reshape(mesh.M, -1)
+    k = block.shape[1]
     
-    mesh.computeMatrixS()
-    return sp.cg(mesh.matrixS, R)[0]
+    # R[cell] += (S + trS)*value для всех элементов и полей одним np.bincount:
+    weights = (mesh.S[:, np.newaxis] + mesh.trS)[:, :, np.newaxis]*block[:, np.newaxis, :]
+    indx = (mesh.cells[:, :, np.newaxis].astype(np.intp)*k + np.arange(k)).ravel()
+    R = np.bincount(indx, weights=weights.ravel(), minlength=mesh.N*k).reshape(mesh.N, k)
+    
+    mesh.computeMatrixS(sparse)
+    
+    if method == 'direct':
+        result = factorize(mesh.matrixS).solve(R)
+    elif method == 'cg':
+        result, infos = pcg(mesh.matrixS, R, precond, tol=tol)
+        for info in infos:
+            if not info.converged:
+                warnings.warn(f"applyCP did not converge: {info}", RuntimeWarning)
+    else:
+        raise ValueError(f"Unknown method '{method}'; Expected 'direct' or 'cg'")
+        
+    return result.reshape((mesh.N, ) + values.shape[1:])
     
     
 # Расчет глобальных матриц для уравнений теории упругости:                   
+
+class StiffnessFactors:
+    """
+    Класс для хранения предварительных расчетов глобальной матрицы жесткости,
+    зависящих только от сетки, но не от упругих свойств
+    
+    Позволяет пересчитывать матрицу K для новых упругих свойств 
+    одной линейной комбинацией матриц XX, YY, XY
+    
+    
+    Атрибуты
+    ------------
+    
+    XX, YY, XY : np.array(shape=(N, N), dtype=np.double) или scipy.sparse.csr_matrix
+        Глобальные матрицы интегралов произведений производных функций формы
+        (см. FEM.kernel.getLocalFactors)
+    sparse : bool
+        Если True, то матрицы хранятся в разреженном формате
+    """
+    
+    def __init__(self, mesh, points, weights, sparse=False, 
+                 workers=None, executor='thread'):
+        """
+        Параметры
+        -------------
+        
+        mesh : MeshClass
+            Сетка, для которой рассчитываются множители
+            
+        points, weights
+            Опорные точки и веса квадратурной формулы
+            
+        sparse : bool, optional
+            Если True, то матрицы собираются в формате scipy.sparse.csr_matrix
+            
+        workers : int, optional
+            Если workers > 1, то элементы сетки делятся на workers частей,
+            которые обрабатываются параллельно в пуле executor
+            (см. AssemblyPlan.assembleDataParallel)
+            
+        executor : {'thread', 'process'} or concurrent.futures.Executor, optional
+            Тип пула для параллельной сборки или существующий пул
+        """
+        
+        mesh.computeAssemblyPlan()
+        self._plan = mesh.assemblyPlan
+        
+        if workers is not None and workers > 1:
+            data = self._plan.assembleDataParallel(
+                partial(getLocalFactors, points=points, weights=weights), 
+                [mesh.coords], workers, executor)
+        else:
+            data = [self._plan.assembleData(local) 
+                    for local in getLocalFactors(mesh.coords, points, weights)]
+        
+        self.XX, self.YY, self.XY = (self._plan.toMatrix(d, sparse) for d in data)
+        
+        self.sparse = sparse
+        
+    def getK(self, D):
+        """
+        Вычисляет матрицу K для упругих свойств D на основе предварительных расчетов
+        """
+        
+        if self.sparse:
+            # Все матрицы имеют общий шаблон разреженности self._plan,
+            # поэтому K собирается напрямую из массивов ненулевых значений:
+            XX, YY, XY = self.XX.data, self.YY.data, self.XY.data
+            XYT = XY[self._plan.transpose]
+        else:
+            XX, YY, XY = self.XX, self.YY, self.XY
+            XYT = XY.T
+        
+        Kxx = XX *D[0, 0] + YY *D[2, 2]
+        Kyy = YY *D[1, 1] + XX *D[2, 2]
+        Kxy = XY *D[0, 1] + XYT*D[2, 2]
+        Kyx = XYT*D[0, 1] + XY *D[2, 2]
+        
+        if self.sparse:
+            return self._plan.assembleBlocks(Kxx, Kxy, Kyx, Kyy)
+        
+        K = np.zeros(shape=(2*XX.shape[0], 2*XX.shape[0]), dtype=np.double)
+        
+        K[0::2, 0::2] = Kxx
+        K[1::2, 1::2] = Kyy
+        K[0::2, 1::2] = Kxy
+        K[1::2, 0::2] = Kyx
+        
+        return K
+        
+
+def getStiffnessFactors(mesh, points, weights, sparse=False, 
+                        workers=None, executor='thread'):
+    """
+    Возвращает предварительные расчеты матрицы жесткости StiffnessFactors
+    для сетки mesh и квадратурной формулы (points, weights)
+    
+    Результат кэшируется в mesh.stiffnessFactors, так что повторные вызовы
+    с теми же параметрами не требуют пересчета
+    
+    Параметры workers, executor задают параллельную сборку при первом вызове
+    (см. StiffnessFactors)
+    """
+    
+    points = np.asarray(points, dtype=np.double)
+    weights = np.asarray(weights, dtype=np.double)
+    key = (points.tobytes(), weights.tobytes(), sparse)
+    
+    if key not in mesh.stiffnessFactors:
+        mesh.stiffnessFactors[key] = StiffnessFactors(mesh, points, weights, sparse, 
+                                                      workers, executor)
+    return mesh.stiffnessFactors[key]
+    
                    
 def getK(mesh, D,
          points=np.array([[-1.0, -1.0], 
                           [ 1.0, -1.0], 
                           [ 1.0,  1.0], 
                           [-1.0,  1.0]], dtype=np.double), #/np.sqrt(3),
-         weights=np.array([1.0, 1.0, 1.0, 1.0], dtype=np.double)):
+         weights=np.array([1.0, 1.0, 1.0, 1.0], dtype=np.double),
+         sparse=False, quadrature=None, cache=None, 
+         workers=None, executor='thread'):
     """
     Рассчитывает глобальную матрицу жесткости K 
     для сетки из четырехугольных элементов
     
     При интегрировании по элементу используется квадратичная формула
     с опорными точками points и весами weights
-    """
+    либо формула quadrature (см. FEM.quadrature.QUADRATURES), если она задана
     
-    # Предварительные расчеты, зависящие только от сетки, но не от упругих свойств:
+    Если sparse = True, то матрица собирается сразу в формате 
+    scipy.sparse.csr_matrix, иначе (default) возвращается плотная матрица
     
-    DNML = [getDNMatrix(t, s) for (t, s) in points]
-
-    XX = np.zeros(shape=(mesh.N, mesh.N), dtype=np.double)
-    YY = np.zeros(shape=(mesh.N, mesh.N), dtype=np.double)
-    XY = np.zeros(shape=(mesh.N, mesh.N), dtype=np.double)
+    Если cache = True, то зависящие только от сетки расчеты 
+    сохраняются в mesh (см. getStiffnessFactors), и повторные вызовы
+    с другими упругими свойствами D сводятся к линейной комбинации матриц
+    По умолчанию cache = sparse: плотные матрицы N x N не хранятся в сетке
     
-    for cell, coords in zip(mesh.cells, mesh.coords):
-        
-        X, Y = coords.T
-        XX_loc = np.zeros(shape=(4, 4), dtype=np.double)
-        YY_loc = np.zeros(shape=(4, 4), dtype=np.double)
-        XY_loc = np.zeros(shape=(4, 4), dtype=np.double)
-        for w, DNM in zip(weights, DNML):
-            dNdX, dNdY = DNM@Y, X@DNM
-            J = np.abs(X@dNdX)
-            XX_loc += w*dNdX[:, np.newaxis]@dNdX[np.newaxis, :]/J
-            YY_loc += w*dNdY[:, np.newaxis]@dNdY[np.newaxis, :]/J
-            XY_loc += w*dNdX[:, np.newaxis]@dNdY[np.newaxis, :]/J
-            
-        for i in range(4):
-            XX[cell[i], cell] += XX_loc[i]
-            YY[cell[i], cell] += YY_loc[i]
-            XY[cell[i], cell] += XY_loc[i]
-            
-    
-    # Вычисление матрицы K на основе предварительных расчетов:
-    
-    K = np.zeros(shape=(2*mesh.N, 2*mesh.N), dtype=np.double)
+    Если workers > 1, то сборка выполняется параллельно по частям сетки
+    в пуле потоков (executor = 'thread') или процессов (executor = 'process')
+    либо в существующем пуле concurrent.futures.Executor, который можно 
+    использовать для нескольких вызовов
+    """
     
-    K[0::2, 0::2] = XX*D[0, 0] + YY*D[2, 2]
-    K[1::2, 1::2] = YY*D[1, 1] + XX*D[2, 2]
-    K[0::2, 1::2] = XY  *D[0, 1] + XY.T*D[2, 2]
-    K[1::2, 0::2] = XY.T*D[0, 1] + XY  *D[2, 2]
-            
-    return K
+    if quadrature is not None:
+        points, weights = getQuadrature(quadrature)
+        
+    if cache is None:
+        cache = sparse
+        
+    if cache:
+        factors = getStiffnessFactors(mesh, points, weights, sparse, 
+                                      workers, executor)
+    else:
+        factors = StiffnessFactors(mesh, points, weights, sparse, 
+                                   workers, executor)
+        
+    return factors.getK(D)
     
 
-def getM(mesh, po, t):
+def getM(mesh, po, t, sparse=False, lumped=False):
     """
     Рассчитывает глобальную матрицу масс системы M
+    
+    Если sparse = True, то матрица собирается в формате scipy.sparse.csr_matrix
+    Если lumped = True, то возвращается диагональная (сосредоточенная) 
+    матрица масс с диагональю getLumpedM(mesh, po, t)
     """
     
-    mesh.computeSMatrix()
+    if lumped:
+        lumpedM = getLumpedM(mesh, po, t)
+        return diags(lumpedM, format='csr') if sparse else np.diag(lumpedM)
+    
+    mesh.computeMatrixS(sparse)
+    
+    if sparse:
+        return kron(mesh.matrixS, np.eye(2), format='csr')*(po*t/6)
+    
     M = np.zeros(shape=(2*mesh.N, 2*mesh.N), dtype=np.double)
     
     M[0::2, 0::2] = mesh.matrixS
@@ -151,13 +363,31 @@ def getM(mesh, po, t):
     
     return M
     
+def getLumpedM(mesh, po, t):
+    """
+    Рассчитывает диагональ сосредоточенной матрицы масс 
+    np.array(shape=(2N, ), dtype=np.double), равную суммам строк 
+    матрицы getM(mesh, po, t), непосредственно по площадям mesh.S и mesh.trS
+    без сборки матрицы площадей сетки
+    """
+    
+    nodal = np.bincount(mesh.cells.ravel(), 
+                        weights=getLocalS(mesh.S, mesh.trS).sum(axis=-1).ravel(),
+                        minlength=mesh.N)*(po*t/6)
+    return np.repeat(nodal, 2)
+    
     
-def getF(mesh):
+def getF(mesh, k=None):
     """
     Возвращает нулевой вектор граничных нагрузок
+    
+    Если задано k, то возвращает блок из k нулевых векторов нагрузок 
+    shape=(2N, k) для одновременного расчета нескольких случаев нагружения
     """
     
-    return np.zeros(shape=(2*mesh.N,), dtype=np.double)
+    if k is None:
+        return np.zeros(shape=(2*mesh.N,), dtype=np.double)
+    return np.zeros(shape=(2*mesh.N, k), dtype=np.double)
     
 
 def horzBorder(y):
@@ -181,30 +411,92 @@ def setFNeiman(mesh, F, p, border_func):
     """
     Устанавливает равномерную граничную нагрузку p 
     вдоль границы border_func(a) = True
+    
+    Вместо функции border_func можно задать имя множества ребер 
+    или узлов сетки (см. MeshClass.getBorderEdges)
+    Рассматриваются только граничные ребра сетки
+    
+    Если F - блок векторов нагрузок shape=(2N, k) (см. getF), то p может быть
+    как числом, так и массивом shape=(k, ) нагрузок для каждого столбца F
     """
     
-    isBorder = border_func(mesh.nodes)
-    for cell in mesh.cells:
-        
-        prev = cell[-1]
-        for curr in cell:
-            if isBorder[prev] and isBorder[curr]:
-                applyNeiman(mesh, F, p, prev, curr)
-            prev = curr
+    selected = mesh.getBorderEdges(border_func)
+    edges = mesh.borderEdges[selected]
+    a1, a2 = mesh.nodes[edges[:, 0]], mesh.nodes[edges[:, 1]]
+    v = np.stack((a2[:, 1] - a1[:, 1], a1[:, 0] - a2[:, 0]), axis=-1)/2
+    
+    for axis in (0, 1):
+        load = np.bincount(edges.ravel(), weights=np.repeat(v[:, axis], 2), 
+                           minlength=mesh.N)
+        F[axis::2] += load*p if F.ndim == 1 else load[:, np.newaxis]*p
             
         
-def fixAxis(mesh, K, F, axis, border_func):
+def fixAxis(mesh, K, F, axis, border_func, value=0.0):
     """
-    Фиксирует положение (Ux = 0 для axis = 0, Uy = 0 для axis = 1)
+    Фиксирует положение (Ux = value для axis = 0, Uy = value для axis = 1)
     вдоль границы border_func(a) = True
+    
+    Функция border_func вычисляется только на граничных узлах сетки
+    Вместо нее можно задать имя множества узлов или ребер сетки,
+    либо маску или список индексов узлов (см. MeshClass.getNodes)
+    
+    Матрица K может быть как плотной, так и разреженной 
+    в формате scipy.sparse.csr_matrix (или csc_matrix)
     """
     
-    for i in np.where(border_func(mesh.nodes))[0]:
-        indx = 2*i + axis
-        # F -= val*K[:, indx]
-        F[indx] = 0 # val
+    indx = 2*mesh.getNodes(border_func) + axis
+    fixDOF(K, F, indx, value)
         
+def fixDOF(K, F, indx, values=0.0):
+    """
+    Фиксирует значения values степеней свободы с индексами indx:
+    вклад заданных перемещений переносится в F (F -= K[:, indx]@values),
+    после чего строки и столбцы indx матрицы K зануляются 
+    с 1 на диагонали, а F[indx] = values
+    
+    F может содержать несколько столбцов нагрузок (shape=(2N, k))
+    """
+    
+    indx = np.asarray(indx)
+    values = np.broadcast_to(np.asarray(values, dtype=np.double), indx.shape)
+    column = (-1, ) + (1, )*(F.ndim - 1)
+    
+    if np.any(values != 0):
+        if issparse(K):
+            Uc = np.zeros(shape=(K.shape[1], ), dtype=np.double)
+            Uc[indx] = values
+            F -= (K@Uc).reshape(column)
+        else:
+            F -= (K[:, indx]@values).reshape(column)
+    F[indx] = values.reshape(column)
+    
+    if issparse(K):
+        fixSparse(K, indx)
+    else:
         K[:, indx] = 0
         K[indx, :] = 0
         K[indx, indx] = 1
-
+        
+def fixSparse(K, indx):
+    """
+    Зануляет строки и столбцы indx разреженной матрицы K 
+    в формате csr_matrix или csc_matrix, устанавливая 1 на диагонали
+    
+    Изменяет только значения K.data, не меняя структуру матрицы
+    """
+    
+    if K.format not in ('csr', 'csc'):
+        raise TypeError(f"Unable to fix matrix of '{K.format}' format; Use csr or csc format instead")
+    
+    isFixed = np.zeros(shape=(K.shape[0], ), dtype=bool)
+    isFixed[indx] = True
+    
+    major = np.repeat(np.arange(K.shape[0]), np.diff(K.indptr))
+    K.data[isFixed[major] | isFixed[K.indices]] = 0
+    
+    isDiag = isFixed[major] & (major == K.indices)
+    K.data[isDiag] = 1
+    
+    missing = np.setdiff1d(indx, major[isDiag])
+    if missing.size > 0:
+        K[missing, missing] = 1
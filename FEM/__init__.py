@@ -3,5 +3,14 @@
 """
 
 from .FEM import *
+from .constraints import *
+from .solvers import *
+from .multigrid import *
+from .decomposition import *
+from .modal import *
+from .recovery import *
+from .dynamics import *
+from . import quadrature
+from . import kernel
 from . import mesh
 from . import interpolation
\ No newline at end of file
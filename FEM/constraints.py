@@ -0,0 +1,152 @@
+__all__ = ["Constraints"]
+
+
+import numpy as np
+
+from scipy.sparse import issparse
+
+from .FEM import fixDOF
+
+
+class Constraints:
+    """
+    Класс для хранения заданных перемещений (кинематических граничных условий)
+    в виде карты степеней свободы сетки
+    
+    Степень свободы 2i + axis соответствует перемещению i-го узла 
+    вдоль оси axis (0 - x, 1 - y)
+    
+    Позволяет за один векторизованный шаг либо исключить заданные степени
+    свободы из системы K U = F (reduce / expand), либо зафиксировать их
+    в матрице K на месте (apply, см. FEM.fixDOF)
+    
+    
+    Атрибуты
+    ------------
+    
+    mesh : MeshClass
+        Сетка, на которой заданы условия
+    isFixed : np.array(shape=(2N, ), dtype=bool)
+        Маска заданных степеней свободы
+    values : np.array(shape=(2N, ), dtype=np.double)
+        Заданные значения перемещений (для незаданных степеней свободы - 0)
+    """
+    
+    def __init__(self, mesh):
+        self.mesh = mesh
+        
+        self.isFixed = np.zeros(shape=(2*mesh.N, ), dtype=bool)
+        self.values = np.zeros(shape=(2*mesh.N, ), dtype=np.double)
+        
+        
+    def fix(self, axis, border, value=0.0):
+        """
+        Задает перемещения вдоль оси axis (0, 1 или None для обеих осей)
+        в узлах border
+        
+        
+        Параметры
+        -------------
+        
+        axis : int or None
+            Ось перемещений
+            
+        border : callable, str or array-like
+            Функция border(nodes) -> маска узлов (например, FEM.vertBorder(x)),
+            вычисляемая только на граничных узлах сетки, как и в FEM.fixAxis,
+            имя множества узлов или ребер сетки, либо маска или список 
+            индексов узлов (см. MeshClass.getNodes)
+            
+        value : float, array-like or callable, optional
+            Заданное значение перемещений: число, 
+            массив значений для каждого выбранного узла
+            или функция value(nodes) от координат выбранных узлов
+            
+        Возвращает self, так что вызовы можно объединять в цепочку
+        """
+        
+        nodes = self.mesh.getNodes(border)
+        
+        if callable(value):
+            value = value(self.mesh.nodes[nodes])
+        value = np.asarray(value, dtype=np.double)
+        
+        for ax in ((0, 1) if axis is None else (axis, )):
+            indx = 2*nodes + ax
+            self.isFixed[indx] = True
+            self.values[indx] = value if value.ndim < 2 else value[:, ax]
+            
+        return self
+    
+    @property
+    def fixed(self):
+        """
+        Индексы заданных степеней свободы
+        """
+        
+        return np.where(self.isFixed)[0]
+    
+    @property
+    def free(self):
+        """
+        Индексы свободных степеней свободы
+        """
+        
+        return np.where(~self.isFixed)[0]
+    
+    
+    def reduce(self, K, F=None):
+        """
+        Исключает заданные степени свободы из системы K U = F
+        
+        Возвращает матрицу Kff и, если F задана, правую часть
+            Ff = F[free] - K[free, fixed]@values[fixed]
+        системы Kff Uf = Ff на свободные степени свободы
+        
+        K может быть как плотной, так и разреженной матрицей,
+        F может содержать несколько столбцов нагрузок (shape=(2N, k))
+        """
+        
+        free, fixed = self.free, self.fixed
+        
+        if issparse(K):
+            Kfree = K.tocsr()[free]
+            Kff = Kfree.tocsc()[:, free].tocsr()
+        else:
+            Kfree = K[free]
+            Kff = Kfree[:, free]
+            
+        if F is None:
+            return Kff
+            
+        Ff = np.array(F[free], dtype=np.double)
+        Uc = self.values[fixed]
+        if np.any(Uc != 0):
+            if issparse(K):
+                Ff -= (Kfree.tocsc()[:, fixed]@Uc).reshape((-1, ) + (1, )*(Ff.ndim - 1))
+            else:
+                Ff -= (Kfree[:, fixed]@Uc).reshape((-1, ) + (1, )*(Ff.ndim - 1))
+                
+        return Kff, Ff
+    
+    def expand(self, Uf):
+        """
+        Восстанавливает полный вектор перемещений (shape=(2N, ) или (2N, k))
+        по решению Uf системы на свободные степени свободы
+        """
+        
+        Uf = np.asarray(Uf)
+        
+        U = np.empty(shape=(self.isFixed.size, ) + Uf.shape[1:], dtype=np.double)
+        U[self.isFixed] = self.values[self.isFixed].reshape((-1, ) + (1, )*(Uf.ndim - 1))
+        U[~self.isFixed] = Uf
+        return U
+    
+    def apply(self, K, F):
+        """
+        Фиксирует заданные степени свободы в системе K U = F на месте
+        без изменения ее размеров (см. FEM.fixDOF)
+        """
+        
+        fixed = self.fixed
+        fixDOF(K, F, fixed, self.values[fixed])
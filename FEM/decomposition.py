@@ -0,0 +1,227 @@
+__all__ = ["SchwarzPreconditioner"]
+
+
+import multiprocessing
+import weakref
+
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+from scipy.sparse import csr_matrix
+
+from .solvers import factorize
+
+
+class SchwarzPreconditioner:
+    """
+    Аддитивный предобуславливатель Шварца для системы K U = F,
+    построенный по разбиению сетки на подобласти (см. FEM.mesh.partitionMesh):
+        z = sum_p R_p.T K_p^-1 R_p r,
+    где R_p - выбор степеней свободы узлов p-ой подобласти
+    (расширенной на overlap слоев элементов), а K_p = R_p K R_p.T
+
+    Является симметричным положительно определенным и используется в FEM.pcg
+    (precond=SchwarzPreconditioner(...)). Разложения матриц подобластей
+    вычисляются и применяются параллельно: в пуле потоков или в постоянных
+    процессах, каждый из которых хранит разложения своих подобластей,
+    так что на каждой итерации передаются только невязки и поправки
+
+
+    Атрибуты
+    ------------
+
+    partition : Partition
+        Разбиение сетки
+    dofs : list of np.array(dtype=np.int)
+        Индексы степеней свободы системы для каждой подобласти
+    """
+
+    def __init__(self, K, mesh, partition, constraints=None, overlap=1,
+                 workers=None, executor='process'):
+        """
+        Параметры
+        -------------
+
+        K : scipy.sparse матрица
+            Матрица системы (например, getK(mesh, D, sparse=True)),
+            из которой исключены заданные степени свободы constraints
+
+        mesh : MeshClass
+            Сетка
+
+        partition : Partition
+            Разбиение сетки на подобласти
+
+        constraints : Constraints, optional
+            Заданные перемещения (см. Constraints.reduce)
+
+        overlap : int, optional
+            Количество слоев элементов, на которое расширяются подобласти
+
+        workers : int, optional
+            Если workers > 1, то подобласти распределяются между workers
+            исполнителями executor, иначе все расчеты ведутся последовательно
+
+        executor : {'thread', 'process'}, optional
+            Пул потоков или постоянные процессы (default)
+        """
+
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor '{executor}'; Expected 'thread' or 'process'")
+
+        self.partition = partition
+        self.shape = K.shape
+
+        # Номера степеней свободы узлов в системе без заданных степеней свободы:
+        indx = np.arange(2*mesh.N)
+        if constraints is not None:
+            indx = np.full(shape=(2*mesh.N, ), fill_value=-1)
+            indx[constraints.free] = np.arange(len(constraints.free))
+
+        self.dofs = []
+        for part in range(partition.parts):
+            nodes = partition.getNodes(mesh, part, overlap)
+            dofs = indx[np.stack((2*nodes, 2*nodes + 1), axis=-1).ravel()]
+            self.dofs.append(dofs[dofs >= 0])
+
+        K = csr_matrix(K)
+        matrices = [K[dofs][:, dofs].tocsc() for dofs in self.dofs]
+
+        self._workers = 1 if workers is None else min(workers, partition.parts)
+        self._executor = executor if self._workers > 1 else None
+        # Подобласти исполнителей: p-ая подобласть у исполнителя p % workers
+        self._groups = [list(range(w, partition.parts, self._workers))
+                        for w in range(self._workers)]
+
+        if self._executor == 'process':
+            context = multiprocessing.get_context()
+            self._connections, self._processes = [], []
+            # Процессы завершаются и при ошибке в конструкторе:
+            self._finalizer = weakref.finalize(self, _shutdown, self._connections, self._processes)
+            try:
+                for group in self._groups:
+                    parent, child = context.Pipe()
+                    process = context.Process(target=_worker, args=(child, ), daemon=True)
+                    process.start()
+                    self._connections.append(parent)
+                    self._processes.append(process)
+                    parent.send({p : matrices[p] for p in group})
+                _receiveAll(self._connections)
+            except BaseException:
+                self._finalizer()
+                raise
+        else:
+            if self._executor == 'thread':
+                self._pool = ThreadPoolExecutor(max_workers=self._workers)
+                self._finalizer = weakref.finalize(self, self._pool.shutdown)
+                factors = list(self._pool.map(lambda A: factorize(A, cache=False), matrices))
+            else:
+                factors = [factorize(A, cache=False) for A in matrices]
+            self._factors = factors
+
+
+    def matvec(self, r):
+        """
+        Применяет предобуславливатель к невязке r
+        """
+
+        r = np.asarray(r, dtype=np.double)
+        z = np.zeros_like(r)
+
+        if self._executor == 'process':
+            for connection, group in zip(self._connections, self._groups):
+                connection.send({p : r[self.dofs[p]] for p in group})
+            for result in _receiveAll(self._connections):
+                for p, zp in result.items():
+                    z[self.dofs[p]] += zp
+            return z
+
+        def solveGroup(group):
+            return [(p, self._factors[p].solve(r[self.dofs[p]])) for p in group]
+
+        if self._executor == 'thread':
+            results = self._pool.map(solveGroup, self._groups)
+        else:
+            results = map(solveGroup, self._groups)
+
+        for result in results:
+            for p, zp in result:
+                z[self.dofs[p]] += zp
+        return z
+
+    __call__ = matvec
+
+    def close(self):
+        """
+        Завершает процессы или пул потоков исполнителей
+        """
+
+        if hasattr(self, '_finalizer'):
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _worker(connection):
+    """
+    Цикл процесса-исполнителя: получает матрицы своих подобластей,
+    раскладывает их и затем решает системы для получаемых невязок
+    до получения None
+
+    Исключения не завершают процесс, а передаются в ответе
+    """
+
+    try:
+        factors = {p : factorize(A, cache=False) for p, A in connection.recv().items()}
+        connection.send(True)
+    except Exception as error:
+        factors = {}
+        _sendError(connection, error)
+
+    while True:
+        residuals = connection.recv()
+        if residuals is None:
+            break
+        try:
+            connection.send({p : factors[p].solve(r) for p, r in residuals.items()})
+        except Exception as error:
+            _sendError(connection, error)
+    connection.close()
+
+
+def _sendError(connection, error):
+    try:
+        connection.send(error)
+    except Exception:
+        # Исключение может не поддерживать сериализацию pickle:
+        connection.send(RuntimeError(f"{type(error).__name__}: {error}"))
+
+
+def _receiveAll(connections):
+    """
+    Получает ответы всех исполнителей (так что каналы остаются
+    согласованными) и возбуждает первое переданное исключение
+    """
+
+    results = [connection.recv() for connection in connections]
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
+
+def _shutdown(connections, processes):
+    for connection in connections:
+        try:
+            connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
@@ -0,0 +1,321 @@
+__all__ = ["criticalTimeStep", "centralDifference", "NewmarkIntegrator"]
+
+
+import warnings
+
+import numpy as np
+
+from scipy.sparse import issparse
+
+from .solvers import factorize
+
+
+def criticalTimeStep(mesh, D, rho, safety=0.9):
+    """
+    Оценивает шаг по времени, при котором явная схема центральных разностей
+    устойчива, как время пробега продольной волной характерного размера
+    наименьшего элемента:
+        dt = safety * min(L) / c,  L = S / max(d1, d2),  c = sqrt(D[0, 0]/rho),
+    где d1, d2 - длины диагоналей элемента площади S
+
+
+    Параметры
+    -------------
+
+    mesh : MeshClass
+        Сетка
+
+    D : np.array(shape=(3, 3))
+        Матрица закона Гука (см. getD)
+
+    rho : float
+        Плотность материала
+
+    safety : float, optional
+        Коэффициент запаса (default 0.9)
+    """
+
+    diagonals = mesh.coords[:, 2:] - mesh.coords[:, :2]
+    L = mesh.S/np.hypot(diagonals[..., 0], diagonals[..., 1]).max(axis=-1)
+
+    return safety*L.min()/np.sqrt(D[0, 0]/rho)
+
+
+def centralDifference(K, M, dt, nsteps, F=None, U0=None, V0=None,
+                      fixed=None, damping=0.0, every=1, mesh=None, D=None, rho=None):
+    """
+    Явная схема центральных разностей для уравнений движения
+        M U'' + damping M U' + K U = F(t)
+    с диагональной (сосредоточенной) матрицей масс M
+
+    Каждый шаг сводится к одному умножению разреженной матрицы K на вектор
+    и поэлементному делению на M
+
+
+    Параметры
+    -------------
+
+    K : scipy.sparse матрица или np.array(shape=(2N, 2N))
+        Матрица жесткости (без исключения заданных степеней свободы)
+
+    M : np.array(shape=(2N, )) или диагональная матрица
+        Сосредоточенная матрица масс (см. getLumpedM или getM(..., lumped=True))
+
+    dt : float or None
+        Шаг по времени (должен быть меньше критического, см. criticalTimeStep)
+        Если None, то он оценивается criticalTimeStep(mesh, D, rho)
+
+    nsteps : int
+        Количество шагов
+
+    F : np.array(shape=(2N, )) или callable, optional
+        Постоянная нагрузка либо функция F(t) -> np.array(shape=(2N, ))
+        По умолчанию нагрузка нулевая
+
+    U0, V0 : np.array(shape=(2N, )), optional
+        Начальные перемещения и скорости (по умолчанию нулевые)
+
+    fixed : array-like, optional
+        Индексы степеней свободы, ускорения которых равны нулю
+        (например, Constraints.fixed), их перемещения остаются равными U0,
+        а начальные скорости считаются нулевыми
+
+    damping : float, optional
+        Коэффициент демпфирования, пропорционального массе
+
+    every : int, optional
+        Перемещения и скорости сохраняются на каждом every-ом шаге
+
+    mesh, D, rho : optional
+        Сетка, матрица закона Гука и плотность для оценки критического шага
+        Если они заданы вместе с dt, то при dt больше критического шага 
+        (criticalTimeStep с safety = 1) выдается предупреждение
+
+
+    Возвращает тройку (times, U, V):
+        times : np.array(shape=(n, )) - моменты времени сохраненных шагов
+        U, V  : np.array(shape=(n, 2N)) - перемещения и скорости в эти моменты
+    """
+
+    hasMaterial = mesh is not None and D is not None and rho is not None
+    if dt is None:
+        if not hasMaterial:
+            raise ValueError("Either dt or mesh, D and rho must be given")
+        dt = criticalTimeStep(mesh, D, rho)
+    elif hasMaterial and dt > criticalTimeStep(mesh, D, rho, safety=1.0):
+        warnings.warn(f"Time step dt = {dt} exceeds the critical one "
+                      f"{criticalTimeStep(mesh, D, rho, safety=1.0)}; "
+                      f"Central difference scheme may be unstable", RuntimeWarning)
+        
+    if issparse(M) or np.ndim(M) == 2:
+        M = M.diagonal()
+
+    invM = 1/np.asarray(M, dtype=np.double)
+    if fixed is not None:
+        invM[fixed] = 0.0
+
+    U = np.zeros_like(invM) if U0 is None else np.array(U0, dtype=np.double)
+    V = np.zeros_like(invM) if V0 is None else np.array(V0, dtype=np.double)
+    if fixed is not None:
+        V[fixed] = 0.0
+
+    if F is None:
+        getF = lambda t: 0.0
+    elif callable(F):
+        getF = F
+    else:
+        getF = lambda t: F
+
+    A = (getF(0.0) - K@U)*invM - damping*V
+    V = V - A*(dt/2) # V(-dt/2)
+
+    # История сохраняется в заранее выделенные массивы:
+    count = nsteps//every + 1
+    times = dt*every*np.arange(count)
+    history = np.empty(shape=(count, U.size), dtype=np.double)
+    velocities = np.empty(shape=(count, U.size), dtype=np.double)
+    
+    for n in range(nsteps + 1):
+        if n > 0:
+            A = (getF(n*dt) - K@U)*invM - damping*V
+
+        if n % every == 0:
+            history[n//every] = U
+            velocities[n//every] = V + A*(dt/2)
+
+        if n == nsteps:
+            break
+
+        V += A*dt  # V(n + 1/2)
+        U += V*dt  # U(n + 1)
+
+    return times, history, velocities
+
+
+class NewmarkIntegrator:
+    """
+    Неявная схема Ньюмарка / HHT-alpha для уравнений движения
+        M U'' + C U' + K U = F(t)
+        
+    Эффективная матрица M + (1 + alpha)(gamma dt C + beta dt^2 K) раскладывается
+    один раз при создании, так что каждый шаг сводится к обратной подстановке
+    
+    
+    Атрибуты
+    ------------
+    
+    dt : float
+        Шаг по времени
+    alpha, beta, gamma : float
+        Параметры схемы
+    """
+    
+    def __init__(self, K, M, dt, C=None, alpha=0.0, beta=None, gamma=None, 
+                 constraints=None):
+        """
+        Параметры
+        -------------
+        
+        K, M : scipy.sparse матрицы или np.array(shape=(2N, 2N))
+            Матрицы жесткости и масс (без исключения заданных степеней свободы)
+            
+        dt : float
+            Шаг по времени
+            
+        C : optional
+            Матрица демпфирования (например, a*M + b*K), по умолчанию нулевая
+            
+        alpha : float, optional
+            Параметр HHT-alpha из [-1/3, 0], alpha < 0 вносит численную 
+            диссипацию высоких частот; alpha = 0 (default) - схема Ньюмарка
+            
+        beta, gamma : float, optional
+            Параметры схемы Ньюмарка
+            По умолчанию gamma = 1/2 - alpha, beta = (1 - alpha)^2/4, 
+            что при alpha = 0 дает безусловно устойчивую схему средних ускорений
+            
+        constraints : Constraints, optional
+            Заданные перемещения, которые исключаются из системы
+            (их значения постоянны во времени)
+        """
+        
+        if not -1/3 <= alpha <= 0:
+            raise ValueError(f"HHT parameter alpha = {alpha} is out of range [-1/3, 0]")
+        
+        self.dt = dt
+        self.alpha = alpha
+        self.gamma = 0.5 - alpha if gamma is None else gamma
+        self.beta = (1 - alpha)**2/4 if beta is None else beta
+        
+        self._size = K.shape[0]
+        if constraints is None:
+            self._free = np.arange(self._size)
+            self._fixedU = None
+            self._lift = 0.0
+        else:
+            self._free = constraints.free
+            self._fixedU = constraints.values[constraints.fixed]
+            self._lift = constraints.reduce(K, np.zeros(shape=(self._size, )))[1]
+            K, M = constraints.reduce(K), constraints.reduce(M)
+            C = None if C is None else constraints.reduce(C)
+            
+        self._constraints = constraints
+        self._K, self._M, self._C = K, M, C
+        
+        Keff = M + (1 + alpha)*self.beta*dt*dt*K
+        if C is not None:
+            Keff = Keff + (1 + alpha)*self.gamma*dt*C
+        self._factor = factorize(Keff, cache=False)
+        
+    def _forces(self, U, V):
+        result = self._K@U
+        if self._C is not None:
+            result = result + self._C@V
+        return result
+    
+    def _expand(self, X, values):
+        if self._constraints is None:
+            return X
+        
+        result = np.empty(shape=(X.shape[0], self._size), dtype=np.double)
+        result[:, self._free] = X
+        result[:, self._constraints.fixed] = values
+        return result
+        
+    def run(self, nsteps, F=None, U0=None, V0=None, chunk=1000, every=1):
+        """
+        Выполняет nsteps шагов по времени, возвращая историю решения по частям
+        
+        
+        Параметры
+        -------------
+        
+        nsteps : int
+            Количество шагов
+            
+        F : np.array(shape=(2N, )) или callable, optional
+            Постоянная нагрузка либо функция F(t) -> np.array(shape=(2N, ))
+            По умолчанию нагрузка нулевая
+            
+        U0, V0 : np.array(shape=(2N, )), optional
+            Начальные перемещения и скорости (по умолчанию нулевые)
+            
+        chunk : int, optional
+            Количество сохраненных шагов в одной части истории
+            
+        every : int, optional
+            Сохраняется каждый every-ый шаг
+            
+        
+        Генератор, возвращающий кортежи (times, U, V, A) из не более чем 
+        chunk сохраненных шагов:
+            times   : np.array(shape=(m, ))
+            U, V, A : np.array(shape=(m, 2N)) - перемещения, скорости и ускорения
+        так что в памяти одновременно находится только одна часть истории
+        """
+        
+        free, dt = self._free, self.dt
+        alpha, beta, gamma = self.alpha, self.beta, self.gamma
+        
+        if F is None:
+            getF = lambda t: self._lift
+        elif callable(F):
+            getF = lambda t: np.asarray(F(t))[free] + self._lift
+        else:
+            F = np.asarray(F)[free] + self._lift
+            getF = lambda t: F
+            
+        U = np.zeros(shape=(free.size, )) if U0 is None else np.array(U0, dtype=np.double)[free]
+        V = np.zeros(shape=(free.size, )) if V0 is None else np.array(V0, dtype=np.double)[free]
+        
+        Fn = getF(0.0)
+        forces = self._forces(U, V)
+        A = factorize(self._M).solve(Fn - forces)
+        
+        fixedZero = 0.0 if self._fixedU is None else np.zeros_like(self._fixedU)
+        buffers = ([], [], [], [])
+        for n in range(nsteps + 1):
+            if n > 0:
+                Fnext = getF(n*dt)
+                
+                # Предикторы:
+                Up = U + dt*V + (0.5 - beta)*dt*dt*A
+                Vp = V + (1 - gamma)*dt*A
+                
+                A = self._factor.solve((1 + alpha)*(Fnext - self._forces(Up, Vp)) 
+                                       - alpha*(Fn - forces))
+                U = Up + beta*dt*dt*A
+                V = Vp + gamma*dt*A
+                
+                Fn, forces = Fnext, self._forces(U, V)
+                
+            if n % every == 0:
+                for buffer, value in zip(buffers, (n*dt, U, V, A)):
+                    buffer.append(value)
+                    
+            if len(buffers[0]) == chunk or (n == nsteps and buffers[0]):
+                yield (np.array(buffers[0]), 
+                       self._expand(np.array(buffers[1]), self._fixedU),
+                       self._expand(np.array(buffers[2]), fixedZero),
+                       self._expand(np.array(buffers[3]), fixedZero))
+                buffers = ([], [], [], [])
@@ -33,3 +33,19 @@ def getDNMatrix(t, s):
                      [ (t - s), -(1 + t),       0 ,  (1 + s)],
                      [ (1 - t),  (t + s), -(1 + s),       0 ]], dtype=np.double)/8
 
+
+
+def getDNMatrices(points):
+    """
+    Рассчитывает матрицы getDNMatrix(t, s) сразу для всех точек (t, s) из points
+    
+    Возвращает np.array(shape=(Q, 4, 4), dtype=np.double)
+    """
+    
+    t, s = np.asarray(points, dtype=np.double).reshape(-1, 2).T
+    zero = np.zeros_like(t)
+    return np.array([[  zero ,  (1 - s),  (s - t), -(1 - t)],
+                     [-(1 - s),    zero ,  (1 + t), -(s + t)],
+                     [ (t - s), -(1 + t),    zero ,  (1 + s)],
+                     [ (1 - t),  (t + s), -(1 + s),    zero ]], 
+                    dtype=np.double).transpose(2, 0, 1)/8
@@ -1,3 +1,9 @@
+__all__ = ["getS", "getFigureS", "getCenter", "isBelong", "orderQuads"]
+
+
+import numpy as np
+
+
 def getS(a, b, c):
     """
     Вычисляет ориентированную площадь двумерного треугольника с вершинами a, b, c
@@ -32,4 +38,49 @@ def isBelong(a, coords):
     
     return  getS(a, coords[ -1],   coords[0])    >= 0 and \
            (getS(a, coords[:-1].T, coords[1:].T) >= 0).all()
+
+
+def orderQuads(nodes, cells):
+    """
+    Упорядочивает узлы четырехугольных элементов cells : shape=(M, 4)
+    с координатами узлов nodes : shape=(N, 2) так же, как KFileReader:
+        1. Контур ориентирован против часовой стрелки
+        2. Сумма 1 и 3 углов < pi
+        3. Центр элемента находится в треугольнике с вершинами (n1, n2, n3)
+    
+    Возвращает тройку (cells, S, trS) - упорядоченные элементы, их площади
+    и площади треугольников на их углах (см. MeshClass)
+    """
+    
+    cells = np.array(cells, dtype=np.int32)
+    X, Y = np.ascontiguousarray(nodes[cells].transpose(2, 1, 0))
+    
+    # Упорядочиваем вершины так, что бы ориентированная площадь была > 0:
+    S1, S3 = getS((X[3], Y[3]), (X[0], Y[0]), (X[1], Y[1])), \
+             getS((X[1], Y[1]), (X[2], Y[2]), (X[3], Y[3]))
+    isSwapped = S1 + S3 < 0
+    cells[isSwapped] = cells[isSwapped][:, [0, 3, 2, 1]]
+    X[:, isSwapped] = X[[0, 3, 2, 1]][:, isSwapped]
+    Y[:, isSwapped] = Y[[0, 3, 2, 1]][:, isSwapped]
+    S1, S3 = np.where(isSwapped, -S1, S1), np.where(isSwapped, -S3, S3)
+    a1, a2, a3, a4 = zip(X, Y)
+    
+    # Делим четырехугольник на два треугольника лучшим образом:
+    def getDot(a, b, c): 
+        return (a[0] - c[0])*(b[0] - c[0]) + \
+               (a[1] - c[1])*(b[1] - c[1])
+    isRotated = S1*getDot(a2, a4, a3) + S3*getDot(a2, a4, a1) > 0
+    cells[isRotated] = np.roll(cells[isRotated], 1, axis=1)
+    
+    T2, T4 = getS(a1, a2, a3), getS(a3, a4, a1)
+    S1, S2, S3, S4 = np.where(isRotated, T4, S1), np.where(isRotated, S1, T2), \
+                     np.where(isRotated, T2, S3), np.where(isRotated, S3, T4)
+    trS = np.stack((S1, S2, S3, S4), axis=-1)
+    
+    # Нумеруем вершины так, что бы центр четырехугольника
+    # оказался в треугольнике с вершинами n1-n2-n3:
+    isFlipped = S2 < S4
+    cells[isFlipped] = np.roll(cells[isFlipped], 2, axis=1)
+    trS[isFlipped] = np.roll(trS[isFlipped], 2, axis=1)
     
+    return cells, S1 + S3, trS
@@ -0,0 +1,79 @@
+__all__ = ["getJacobians", "getLocalFactors", "getLocalS"]
+
+
+import numpy as np
+
+from .formFunc import getDNMatrices
+
+
+"""
+Векторизованные вычисления локальных матриц сразу для всех элементов сетки
+
+Все функции принимают список координат узлов элементов 
+coords : np.array(shape=(M, 4, 2), dtype=np.double) (см. MeshClass.coords)
+и список опорных точек квадратурной формулы 
+points : np.array(shape=(Q, 2), dtype=np.double)
+"""
+
+
+def getGradients(coords, points):
+    """
+    Рассчитывает в опорных точках points всех элементов величины
+        dNdX[m, q, i] = J * dNi/dx,  dNdY[m, q, i] = J * dNi/dy,
+    где J - якобиан отображения идеального элемента на m-ый элемент сетки
+    
+    Возвращает dNdX, dNdY : np.array(shape=(M, Q, 4), dtype=np.double)
+    """
+    
+    DNM = getDNMatrices(points)
+    X, Y = coords[..., 0], coords[..., 1]
+    
+    return np.einsum('qij,mj->mqi', DNM, Y), np.einsum('mi,qij->mqj', X, DNM)
+    
+
+def getJacobians(coords, points):
+    """
+    Рассчитывает модули якобианов J[m, q] отображения идеального элемента 
+    на m-ый элемент сетки в опорных точках points
+    """
+    
+    dNdX, _ = getGradients(coords, points)
+    return np.abs(np.einsum('mi,mqi->mq', coords[..., 0], dNdX))
+    
+
+def getLocalFactors(coords, points, weights):
+    """
+    Рассчитывает независящие от упругих свойств локальные множители 
+    матрицы жесткости для всех элементов:
+        XX[m, i, j] = integral(dNi/dx * dNj/dx),
+        YY[m, i, j] = integral(dNi/dy * dNj/dy),
+        XY[m, i, j] = integral(dNi/dx * dNj/dy)
+    по квадратурной формуле с опорными точками points и весами weights
+    
+    Возвращает XX, YY, XY : np.array(shape=(M, 4, 4), dtype=np.double)
+    """
+    
+    dNdX, dNdY = getGradients(coords, points)
+    c = weights/np.abs(np.einsum('mi,mqi->mq', coords[..., 0], dNdX))
+    
+    return (np.einsum('mq,mqi,mqj->mij', c, dNdX, dNdX),
+            np.einsum('mq,mqi,mqj->mij', c, dNdY, dNdY),
+            np.einsum('mq,mqi,mqj->mij', c, dNdX, dNdY))
+
+
+def getLocalS(S, trS):
+    """
+    Рассчитывает локальные матрицы площадей для всех элементов
+    по их площадям S : np.array(shape=(M, )) и площадям треугольников 
+    на углах элементов trS : np.array(shape=(M, 4)) (см. MeshClass.computeMatrixS)
+    
+    Возвращает np.array(shape=(M, 4, 4), dtype=np.double)
+    """
+    
+    k = np.array([[2.0, 1.0, 0.5, 1.0], 
+                  [1.0, 2.0, 1.0, 0.5], 
+                  [0.5, 1.0, 2.0, 1.0], 
+                  [1.0, 0.5, 1.0, 2.0]])/6
+    return k*(S[:, np.newaxis, np.newaxis] + 
+              trS[:, :, np.newaxis] + 
+              trS[:, np.newaxis, :])
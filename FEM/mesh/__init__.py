@@ -4,6 +4,9 @@
 
 
 from .mesh import *
+from .partition import *
+from . import assembly
+from . import generator
 from . import reader
 from . import plot
 from . import search
\ No newline at end of file
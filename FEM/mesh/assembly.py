@@ -0,0 +1,279 @@
+__all__ = ["assembleMatrix", "AssemblyPlan"]
+
+
+import numpy as np
+
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+from scipy.sparse import coo_matrix, csr_matrix
+
+
+def assembleMatrix(cells, N, local, sparse=False):
+    """
+    Собирает глобальную матрицу размера N x N из локальных матриц элементов
+
+
+    Параметры
+    -------------
+
+    cells : np.array(shape=(M, 4), dtype=np.int)
+        Список номеров узлов элементов сетки
+
+    N : int
+        Количество узлов сетки
+
+    local : np.array(shape=(M, 4, 4), dtype=np.double)
+        Список локальных матриц элементов:
+            local[k, i, j] добавляется к элементу (cells[k, i], cells[k, j])
+
+    sparse : bool, optional
+        Если True, то матрица собирается сразу в разреженном формате
+        scipy.sparse.csr_matrix, и затраты памяти и времени пропорциональны
+        количеству элементов сетки, а не N^2
+        Иначе (default) возвращается плотная матрица np.array(shape=(N, N))
+    """
+
+    rows = np.broadcast_to(cells[:, :, np.newaxis], local.shape).ravel()
+    cols = np.broadcast_to(cells[:, np.newaxis, :], local.shape).ravel()
+
+    if sparse:
+        return coo_matrix((local.ravel(), (rows, cols)), shape=(N, N)).tocsr()
+
+    return np.bincount(rows.astype(np.intp)*N + cols, weights=local.ravel(),
+                       minlength=N*N).reshape(N, N)
+
+
+class AssemblyPlan:
+    """
+    Класс, хранящий результат символьной сборки глобальных матриц сетки:
+    шаблон разреженности в формате CSR и индексы, по которым элементы
+    локальных матриц попадают в массив ненулевых значений
+
+    Численная сборка после этого сводится к одному вызову np.bincount
+
+
+    Атрибуты
+    ------------
+
+    N : int
+        Размер собираемых матриц (количество узлов сетки)
+    nnz : int
+        Количество структурно ненулевых элементов
+    indptr, indices : np.array(dtype=np.int32)
+        Шаблон разреженности матрицы N x N в формате CSR
+        (индексы внутри строк упорядочены)
+    scatter : np.array(shape=(M*16, ), dtype=np.int)
+        Номер ненулевого элемента, в который попадает каждый
+        элемент local.ravel() локальных матриц (M, 4, 4)
+    transpose : np.array(shape=(nnz, ), dtype=np.int)
+        Номер ненулевого элемента (j, i) для каждого ненулевого элемента (i, j)
+
+    Шаблоны разреженности копируются в каждую собранную матрицу,
+    так что изменение структуры одной матрицы не затрагивает остальные
+    """
+
+    def __init__(self, cells, N):
+        """
+        Параметры
+        -------------
+
+        cells : np.array(shape=(M, 4), dtype=np.int)
+            Список номеров узлов элементов сетки
+
+        N : int
+            Количество узлов сетки
+        """
+
+        cells = np.asarray(cells, dtype=np.int64)
+        keys = (cells[:, :, np.newaxis]*N + cells[:, np.newaxis, :]).ravel()
+        keys, scatter = np.unique(keys, return_inverse=True)
+
+        rows, cols = np.divmod(keys, N)
+
+        self.N = N
+        self.nnz = keys.size
+
+        index_type = np.int32 if self.nnz < np.iinfo(np.int32).max else np.int64
+
+        self.indices = cols.astype(np.int32)
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=N)))
+                                    ).astype(index_type)
+        self.scatter = scatter.astype(index_type)
+        self.transpose = np.searchsorted(keys, cols*N + rows).astype(index_type)
+
+        # Положения блоков 2x2 в шаблоне матрицы размера 2N x 2N:
+        #   элемент (i, j) блока (a, b) находится в строке 2i + a
+        #   на месте 4*indptr[i] + 2a*len_i + 2k + b, где k - номер (i, j) в строке i
+        lens = np.diff(self.indptr)
+        k = np.arange(self.nnz) - np.repeat(self.indptr[:-1], lens)
+        base = 4*np.repeat(self.indptr[:-1], lens).astype(np.int64) + 2*k
+        shift = 2*np.repeat(lens, lens)
+        self._blocks = np.array([[base,         base + 1],
+                                 [base + shift, base + shift + 1]]).astype(
+                                     np.int32 if 4*self.nnz < np.iinfo(np.int32).max else np.int64)
+
+        self._blockIndices = np.empty(shape=(4*self.nnz, ), dtype=np.int32)
+        self._blockIndices[self._blocks[:, 0]] = 2*self.indices
+        self._blockIndices[self._blocks[:, 1]] = 2*self.indices + 1
+
+        self._blockIndptr = np.empty(shape=(2*N + 1, ), dtype=index_type)
+        self._blockIndptr[0] = 0
+        self._blockIndptr[1::2] = 4*self.indptr[:-1] + 2*lens
+        self._blockIndptr[2::2] = 4*self.indptr[1:]
+
+
+    def assembleData(self, local):
+        """
+        Возвращает массив ненулевых значений глобальной матрицы,
+        собранной из локальных матриц local : np.array(shape=(M, 4, 4))
+        """
+
+        return np.bincount(self.scatter, weights=local.ravel(), minlength=self.nnz)
+
+    def toMatrix(self, data, sparse=True):
+        """
+        Возвращает матрицу N x N с шаблоном разреженности сетки
+        и ненулевыми значениями data
+
+        Если sparse = True (default), то в формате scipy.sparse.csr_matrix,
+        иначе в виде плотной матрицы np.array(shape=(N, N))
+        """
+
+        if sparse:
+            matrix = csr_matrix((data, self.indices.copy(), self.indptr.copy()),
+                                shape=(self.N, self.N), copy=False)
+            matrix.has_sorted_indices = True
+            return matrix
+
+        rows = np.repeat(np.arange(self.N), np.diff(self.indptr))
+        matrix = np.zeros(shape=(self.N, self.N), dtype=data.dtype)
+        matrix[rows, self.indices] = data
+        return matrix
+
+    def assembleDataParallel(self, kernel, arrays, workers, executor='thread'):
+        """
+        Параллельная численная сборка по частям сетки
+        
+        Элементы сетки делятся на workers непрерывных частей, для каждой из которых
+        kernel(*[a[part] for a in arrays]) вычисляет локальные матрицы 
+        элементов части (shape=(m, 4, 4)) или кортеж таких матриц, 
+        после чего они собираются в суммы по ненулевым элементам, 
+        затрагиваемым частью, и добавляются к общему массиву
+        
+        Исполнителям передаются только входные данные части и компактные 
+        индексы ее ненулевых элементов, а возвращаются только их суммы,
+        так что память и объем передаваемых данных не растут с workers
+        
+        
+        Параметры
+        -------------
+        
+        kernel : callable
+            Функция расчета локальных матриц
+            Для пула процессов должна поддерживать сериализацию pickle
+            
+        arrays : list of np.array
+            Поэлементные входные данные kernel (первая ось - номер элемента)
+            
+        workers : int
+            Количество частей и параллельных исполнителей
+            
+        executor : {'thread', 'process'} or concurrent.futures.Executor, optional
+            Пул потоков (default) или процессов, создаваемый на время вызова,
+            либо существующий пул, который используется повторно 
+            и не закрывается
+            
+        Возвращает np.array(shape=(nnz, ), dtype=np.double) 
+        или np.array(shape=(K, nnz), dtype=np.double), если kernel
+        возвращает кортеж из K локальных матриц
+        """
+        
+        if isinstance(executor, Executor):
+            return self._assembleDataParallel(kernel, arrays, workers, executor)
+        
+        if executor == 'thread':
+            Pool = ThreadPoolExecutor
+        elif executor == 'process':
+            Pool = ProcessPoolExecutor
+        else:
+            raise ValueError(f"Unknown executor '{executor}'; Expected 'thread', 'process' "
+                             f"or concurrent.futures.Executor")
+        
+        with Pool(max_workers=workers) as pool:
+            return self._assembleDataParallel(kernel, arrays, workers, pool)
+        
+    def _assembleDataParallel(self, kernel, arrays, workers, pool):
+        
+        M = self.scatter.size//16
+        bounds = np.linspace(0, M, workers + 1).astype(np.int64)
+        
+        parts = []
+        for begin, end in zip(bounds[:-1], bounds[1:]):
+            if begin < end:
+                positions, inverse = self._getPartIndices(begin, end)
+                parts.append((positions, pool.submit(_assembleDataPart, kernel, 
+                                                     [a[begin:end] for a in arrays], 
+                                                     inverse, positions.size)))
+        
+        result = None
+        for positions, part in parts:
+            sums = part.result()
+            if result is None:
+                result = np.zeros(shape=sums.shape[:-1] + (self.nnz, ), dtype=sums.dtype)
+            result[..., positions] += sums
+        return result
+    
+    def _getPartIndices(self, begin, end):
+        """
+        Возвращает упорядоченные номера ненулевых элементов, затрагиваемых
+        элементами сетки begin, ..., end - 1, и номер среди них для каждого 
+        элемента их локальных матриц
+        """
+        
+        scatter = self.scatter[16*begin:16*end]
+        isUsed = np.zeros(shape=(self.nnz, ), dtype=bool)
+        isUsed[scatter] = True
+        positions = np.flatnonzero(isUsed)
+        
+        rank = np.empty(shape=(self.nnz, ), dtype=self.scatter.dtype)
+        rank[positions] = np.arange(positions.size)
+        return positions, rank[scatter]
+    
+    def assemble(self, local, sparse=True):
+        """
+        Собирает глобальную матрицу из локальных матриц local : np.array(shape=(M, 4, 4))
+        """
+
+        return self.toMatrix(self.assembleData(local), sparse)
+
+    def assembleBlocks(self, xx, xy, yx, yy):
+        """
+        Собирает матрицу размера 2N x 2N в формате scipy.sparse.csr_matrix:
+            K[2i + a, 2j + b] = ab[p], где p - номер ненулевого элемента (i, j)
+        по массивам ненулевых значений xx, xy, yx, yy блоков
+        """
+
+        data = np.empty(shape=(4*self.nnz, ), dtype=np.result_type(xx, xy, yx, yy))
+        data[self._blocks[0, 0]] = xx
+        data[self._blocks[0, 1]] = xy
+        data[self._blocks[1, 0]] = yx
+        data[self._blocks[1, 1]] = yy
+
+        matrix = csr_matrix((data, self._blockIndices.copy(), self._blockIndptr.copy()),
+                            shape=(2*self.N, 2*self.N), copy=False)
+        matrix.has_sorted_indices = True
+        return matrix
+
+
+def _assembleDataPart(kernel, arrays, inverse, size):
+    """
+    Собирает суммы локальных матриц части элементов сетки по ее ненулевым 
+    элементам с компактными номерами inverse (см. AssemblyPlan.assembleDataParallel)
+    """
+    
+    local = kernel(*arrays)
+    if isinstance(local, np.ndarray):
+        return np.bincount(inverse, weights=local.ravel(), minlength=size)
+    
+    return np.array([np.bincount(inverse, weights=l.ravel(), minlength=size)
+                     for l in local])
@@ -0,0 +1,104 @@
+__all__ = ["writeArrays", "readArrays", "getFileKey"]
+
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+# Формат файла:
+#   MAGIC, длина заголовка (8 байт, little-endian), заголовок в JSON,
+#   затем массивы в порядке следования в заголовке, выровненные на ALIGN байт
+MAGIC = b'FEMMESH\x01'
+ALIGN = 64
+
+
+def _align(offset):
+    return (offset + ALIGN - 1)//ALIGN*ALIGN
+
+
+def writeArrays(path, arrays, meta=None):
+    """
+    Записывает в файл path словарь массивов arrays (name -> np.array)
+    и словарь метаданных meta, сериализуемый в JSON
+
+    Запись идет во временный файл, заменяющий path после успешного завершения,
+    так что параллельные читатели не увидят частично записанный файл
+    """
+
+    arrays = {name : np.ascontiguousarray(array) for name, array in arrays.items()}
+
+    # Смещения массивов отсчитываются от начала данных,
+    # следующих за выровненным заголовком:
+    entries, offset = {}, 0
+    for name, array in arrays.items():
+        entries[name] = dict(dtype=array.dtype.str, shape=array.shape, offset=offset)
+        offset = _align(offset + array.nbytes)
+
+    header = json.dumps(dict(arrays=entries, meta=meta or {})).encode('utf-8')
+    start = _align(len(MAGIC) + 8 + len(header))
+
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, 'little'))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(start + entries[name]['offset'])
+            file.write(array.tobytes())
+    os.replace(temp, path)
+
+
+def readArrays(path, mmap=True):
+    """
+    Считывает файл path, записанный writeArrays
+
+    Если mmap = True (default), то массивы отображаются в память через np.memmap
+    (только для чтения) без копирования данных, иначе считываются целиком
+
+    Возвращает пару (arrays, meta)
+    Если path не является файлом этого формата, то вызывается ValueError
+    """
+
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"'{path}' is not a binary mesh file")
+        length = int.from_bytes(file.read(8), 'little')
+        header = json.loads(file.read(length).decode('utf-8'))
+
+        start = _align(len(MAGIC) + 8 + length)
+        arrays = {}
+        for name, entry in header['arrays'].items():
+            dtype, shape = np.dtype(entry['dtype']), tuple(entry['shape'])
+            if np.prod(shape) == 0:
+                arrays[name] = np.empty(shape=shape, dtype=dtype)
+            elif mmap:
+                arrays[name] = np.asarray(np.memmap(path, dtype=dtype, mode='r', shape=shape,
+                                                    offset=start + entry['offset']))
+            else:
+                file.seek(start + entry['offset'])
+                arrays[name] = np.fromfile(file, dtype=dtype,
+                                           count=int(np.prod(shape))).reshape(shape)
+
+    return arrays, header['meta']
+
+
+def getFileKey(path, content=True):
+    """
+    Возвращает словарь, идентифицирующий содержимое файла path:
+    размер, время изменения и (если content = True) хэш SHA-1 содержимого
+    """
+
+    stat = os.stat(path)
+    key = dict(size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    if content:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                sha.update(block)
+        key['sha1'] = sha.hexdigest()
+
+    return key
@@ -0,0 +1,213 @@
+__all__ = ["rectangleMesh", "plateWithHoleMesh", "subdivide"]
+
+
+import numpy as np
+
+from scipy.sparse import csr_matrix
+
+from FEM.geometry import orderQuads
+from .mesh import MeshClass
+
+
+def _gridCells(nx, ny):
+    """
+    Возвращает элементы структурированной сетки из (nx + 1) x (ny + 1) узлов,
+    пронумерованных по строкам: узел (i, j) имеет номер j*(nx + 1) + i
+    """
+
+    i, j = np.meshgrid(np.arange(nx), np.arange(ny))
+    base = (j*(nx + 1) + i).ravel()
+    return np.stack((base, base + 1, base + nx + 2, base + nx + 1), axis=-1)
+
+
+def _gridEdges(nodes):
+    """
+    Возвращает ребра np.array(shape=(E, 2)) ломаной, проходящей через узлы nodes
+    """
+
+    nodes = np.asarray(nodes)
+    return np.stack((nodes[:-1], nodes[1:]), axis=-1)
+
+
+def _buildMesh(nodes, cells, borders, dtype):
+    """
+    Создает MeshClass по узлам, неупорядоченным элементам и словарю
+    границ name -> упорядоченные вдоль границы индексы узлов,
+    из которых создаются одноименные множества узлов и ребер
+    """
+
+    cells, S, trS = orderQuads(nodes, cells)
+    return MeshClass(nodes, cells, S, trS, copy=False, dtype=dtype,
+                     nodeSets={name : ids for name, ids in borders.items()},
+                     edgeSets={name : _gridEdges(ids) for name, ids in borders.items()})
+
+
+def rectangleMesh(width, height, nx, ny, origin=(0.0, 0.0), dtype=np.double):
+    """
+    Создает структурированную сетку прямоугольника [x0, x0 + width] x [y0, y0 + height]
+    из nx x ny прямоугольных элементов
+
+    Множества узлов и ребер 'left', 'right', 'bottom', 'top' содержат
+    соответствующие стороны прямоугольника
+    """
+
+    x = origin[0] + np.linspace(0.0, width,  nx + 1)
+    y = origin[1] + np.linspace(0.0, height, ny + 1)
+    nodes = np.stack(np.meshgrid(x, y), axis=-1).reshape(-1, 2)
+
+    ids = np.arange((nx + 1)*(ny + 1)).reshape(ny + 1, nx + 1)
+    borders = dict(left=ids[:, 0], right=ids[:, -1], bottom=ids[0], top=ids[-1])
+
+    return _buildMesh(nodes, _gridCells(nx, ny), borders, dtype)
+
+
+def plateWithHoleMesh(width=9.0, height=3.0, radius=0.5, nt=16, nr=12, ratio=1.0,
+                      quarter=True, dtype=np.double):
+    """
+    Создает сетку пластины с круговым отверстием (задача Кирша,
+    см. doc/meshes/kirsch/code.txt)
+
+
+    Параметры
+    -------------
+
+    width, height : float, optional
+        Размеры четверти пластины [0, width] x [0, height],
+        центр отверстия находится в начале координат
+
+    radius : float, optional
+        Радиус отверстия
+
+    nt : int, optional
+        Количество элементов вдоль четверти отверстия
+        Распределяется между правой и верхней сторонами пластины
+        пропорционально их длинам
+
+    nr : int, optional
+        Количество элементов от отверстия до внешней границы
+
+    ratio : float, optional
+        Отношение размеров соседних по радиусу элементов (> 1 сгущает
+        сетку к отверстию)
+
+    quarter : bool, optional
+        Если True (default), то создается четверть пластины с множествами
+        узлов и ребер 'hole', 'left' (x = 0), 'bottom' (y = 0), 'right', 'top'
+        Иначе - вся пластина [-width, width] x [-height, height]
+        с множествами 'hole', 'left', 'right', 'bottom', 'top'
+    """
+
+    n1 = min(max(int(round(nt*height/(width + height))), 1), nt - 1)
+    n2 = nt - n1
+
+    # Точки на внешней границе: вверх по правой стороне, затем влево по верхней
+    outer = np.concatenate((
+        np.stack((np.full(n1, width), np.linspace(0.0, height, n1 + 1)[:-1]), axis=-1),
+        np.stack((np.linspace(width, 0.0, n2 + 1), np.full(n2 + 1, height)), axis=-1)
+    ))
+    angles = np.linspace(0.0, np.pi/2, nt + 1)
+    inner = radius*np.stack((np.cos(angles), np.sin(angles)), axis=-1)
+    inner[0, 1], inner[-1, 0] = 0.0, 0.0
+
+    if ratio == 1.0:
+        rho = np.linspace(0.0, 1.0, nr + 1)
+    else:
+        rho = (ratio**np.arange(nr + 1) - 1)/(ratio**nr - 1)
+
+    # Узел (i, j): i-ый по углу, j-ый по радиусу
+    nodes = (inner[np.newaxis] + rho[:, np.newaxis, np.newaxis]*(outer - inner)[np.newaxis]
+            ).reshape(-1, 2)
+    cells = _gridCells(nt, nr)
+
+    ids = np.arange((nt + 1)*(nr + 1)).reshape(nr + 1, nt + 1)
+    borders = dict(hole=ids[0], bottom=ids[:, 0], left=ids[:, -1],
+                   right=ids[-1, :n1 + 1], top=ids[-1, n1:])
+
+    if quarter:
+        return _buildMesh(nodes, cells, borders, dtype)
+
+    # Отражаем четверть относительно осей и объединяем совпадающие узлы:
+    signs = np.array([[1.0, 1.0], [-1.0, 1.0], [-1.0, -1.0], [1.0, -1.0]])
+    allNodes = (nodes[np.newaxis]*signs[:, np.newaxis] + 0.0).reshape(-1, 2)
+    allNodes, inverse = np.unique(allNodes, axis=0, return_inverse=True)
+    inverse = inverse.reshape(4, -1)
+
+    allCells = np.concatenate([inverse[k][cells] for k in range(4)])
+
+    hole = np.concatenate([inverse[k][ids[0]][::(-1)**k][:-1] for k in range(4)])
+    return _buildMesh(allNodes, allCells, dict(
+        hole=np.append(hole, hole[0]),
+        right=np.concatenate((inverse[3][borders['right']][::-1], inverse[0][borders['right']][1:])),
+        top=np.concatenate((inverse[0][borders['top']], inverse[1][borders['top']][::-1][1:])),
+        left=np.concatenate((inverse[1][borders['right']][::-1], inverse[2][borders['right']][1:])),
+        bottom=np.concatenate((inverse[2][borders['top']], inverse[3][borders['top']][::-1][1:])),
+    ), dtype)
+
+
+def subdivide(mesh, prolongation=False):
+    """
+    Равномерно измельчает сетку mesh, делая каждый элемент на 4 элемента
+    по серединам ребер и центру (узлы исходной сетки сохраняют свои номера)
+
+    Множества узлов дополняются серединами граничных ребер, обе вершины которых
+    принадлежат множеству, множества ребер - половинами своих ребер
+
+    Если prolongation = True, то возвращается пара (mesh, P), где
+    P : scipy.sparse.csr_matrix(shape=(N_fine, N_coarse)) - матрица
+    билинейной интерполяции узловых значений с исходной сетки на новую
+    """
+
+    N, M = mesh.N, mesh.M
+
+    # Уникальные ребра и их середины:
+    start, end = mesh.cells, np.roll(mesh.cells, -1, axis=1)
+    keys = np.minimum(start, end).astype(np.int64)*N + np.maximum(start, end)
+    keys, edgeOf = np.unique(keys.ravel(), return_inverse=True)
+    edges = np.stack(np.divmod(keys, N), axis=-1)
+    E = len(edges)
+
+    mids = N + edgeOf.reshape(M, 4)
+    centers = N + E + np.arange(M)
+    nodes = np.concatenate((mesh.nodes,
+                            mesh.nodes[edges].mean(axis=1),
+                            mesh.nodes[mesh.cells].mean(axis=1)))
+
+    n1, n2, n3, n4 = mesh.cells.T
+    m12, m23, m34, m41 = mids.T
+    cells = np.stack((np.stack((n1, m12, centers, m41), axis=-1),
+                      np.stack((m12, n2, m23, centers), axis=-1),
+                      np.stack((centers, m23, n3, m34), axis=-1),
+                      np.stack((m41, centers, m34, n4), axis=-1)), axis=1).reshape(-1, 4)
+    cells, S, trS = orderQuads(nodes, cells)
+
+    def getMid(a, b):
+        pos = np.searchsorted(keys, np.minimum(a, b).astype(np.int64)*N + np.maximum(a, b))
+        return N + pos
+
+    borderEdges = mesh.borderEdges
+    nodeSets = {}
+    for name, ids in mesh.nodeSets.items():
+        isSelected = np.zeros(shape=(N, ), dtype=bool)
+        isSelected[ids] = True
+        selected = borderEdges[isSelected[borderEdges].all(axis=-1)]
+        nodeSets[name] = np.concatenate((ids, np.unique(getMid(*selected.T))))
+
+    edgeSets = {}
+    for name, pairs in mesh.edgeSets.items():
+        a, b = pairs.T
+        m = getMid(a, b)
+        edgeSets[name] = np.stack((np.stack((a, m), axis=-1),
+                                   np.stack((m, b), axis=-1)), axis=1).reshape(-1, 2)
+
+    fine = MeshClass(nodes, cells, S, trS, copy=False, dtype=mesh.nodes.dtype,
+                     nodeSets=nodeSets, edgeSets=edgeSets)
+
+    if not prolongation:
+        return fine
+
+    rows = np.concatenate((np.arange(N), np.repeat(N + np.arange(E), 2), np.repeat(centers, 4)))
+    cols = np.concatenate((np.arange(N), edges.ravel(), mesh.cells.ravel()))
+    vals = np.concatenate((np.ones(N), np.full(2*E, 0.5), np.full(4*M, 0.25)))
+    P = csr_matrix((vals, (rows, cols)), shape=(fine.N, N))
+
+    return fine, P
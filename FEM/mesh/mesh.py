@@ -1,13 +1,21 @@
-__all__ = ["MeshClass", "meshFrom"]
+__all__ = ["MeshClass", "meshFrom", "saveMesh", "loadMesh"]
 
 
+import os
+import warnings
+
 import numpy as np
 
-from itertools import combinations
+from scipy.sparse import issparse
 
 
+from .assembly import AssemblyPlan
+from .binary import writeArrays, readArrays, getFileKey
+from .renumbering import getRCMOrder, getCurveOrder
+from .partition import partitionMesh
 from .reader import KFileReader
 from FEM.geometry import getCenter, getS
+from FEM.kernel import getLocalS
 from .plot import plotMesh, plotMeshNodes
 
 
@@ -17,6 +25,11 @@ class MeshClass:
     
     (!) Предполагается, что после инициализации данные о сетке не меняются
     
+    Производные данные (coords, centers, B, maxDiff, neighbours, border*, 
+    nodesTo*, assemblyPlan, matrixS) вычисляются при первом обращении 
+    (или вызове соответствующего метода compute*) и хранятся до сброса 
+    методом dropCaches
+    
     
     Атрибуты
     ------------
@@ -46,6 +59,8 @@ class MeshClass:
             
     centers : np.array(shape=(M, 4), dtype=np.double)
         Список центров элементов сетки
+    B : np.array(shape=(M, 2, 2), dtype=np.double)
+        Список матриц B элементов сетки для расчета деформаций (см. FEM.getB)
     maxDiff : float
         Максимальное расстояние от центра элемента до его вершин по всем элементам
         
@@ -54,12 +69,83 @@ class MeshClass:
             ni - индекс элемента, граничащего с текущем через i-ое ребро
             (соединяющее i-ую и i+1-ую вершины)
             или NEIGHNONE, если через это ребро соседей нет
+            
+    nodesToCellsPtr, nodesToCells : np.array(dtype=np.int)
+        Элементы, содержащие узлы, в формате CSR:
+            nodesToCells[nodesToCellsPtr[i]:nodesToCellsPtr[i + 1]] - 
+            упорядоченный список индексов элементов, содержащих i-ый узел
+    nodesToNodesPtr, nodesToNodes : np.array(dtype=np.int)
+        Узлы, соединенные ребрами элементов, в формате CSR:
+            nodesToNodes[nodesToNodesPtr[i]:nodesToNodesPtr[i + 1]] - 
+            упорядоченный список индексов узлов, соседних с i-ым узлом
+            
+    borderCells : np.array(shape=(B, ), dtype=np.int)
+        Список индексов элементов, содержащих граничные ребра сетки
+    borderEdgesRel : np.array(shape=(B, ), dtype=np.int)
+        Список номеров граничных ребер внутри элементов borderCells
+    borderEdges : np.array(shape=(B, 2), dtype=np.int)
+        Список пар индексов узлов граничных ребер 
+        (в порядке обхода элемента против часовой стрелки)
+    borderNormals : np.array(shape=(B, 2), dtype=np.double)
+        Список единичных внешних нормалей к граничным ребрам
+    borderLengths : np.array(shape=(B, ), dtype=np.double)
+        Список длин граничных ребер
+    borderNodes : np.array(dtype=np.int)
+        Упорядоченный список индексов граничных узлов сетки
+        
+    nodeSets : dict
+        Именованные множества узлов: name -> np.array(dtype=np.int) индексов узлов
+    edgeSets : dict
+        Именованные множества ребер: name -> np.array(shape=(E, 2), dtype=np.int) 
+        пар индексов узлов
     
-    matrixS : np.array(shape=(N, N), dtype=np.double)
-        Матрица площадей сетки
+    assemblyPlan : AssemblyPlan
+        Шаблон разреженности глобальных матриц сетки и индексы 
+        для сборки их из локальных матриц элементов
+    
+    matrixS : np.array(shape=(N, N), dtype=np.double) или scipy.sparse.csr_matrix
+        Матрица площадей сетки в форме, заданной последним вызовом 
+        computeMatrixS (по умолчанию - плотная)
+    sparseMatrixS : scipy.sparse.csr_matrix
+        Матрица площадей сетки в формате CSR, из которой получается matrixS
+        
+    nodePerm, cellPerm : np.array(dtype=np.int) or None
+        Для перенумерованной сетки (см. renumbered) - исходные номера 
+        узлов и элементов: i-ый узел сетки имел номер nodePerm[i]
+        
+    stiffnessFactors : dict
+        Кэш предварительных расчетов матрицы жесткости, 
+        не зависящих от упругих свойств (см. FEM.getStiffnessFactors)
     """
     
-    def __init__(self, nodes, cells, S, trS, copy=True):
+    # Производные данные сетки, вычисляемые при первом обращении:
+    #   имя -> метод, вычисляющий его (вместе с остальными данными группы)
+    _CACHED = {
+        'coords'          : 'computeCoords',
+        'centers'         : 'computeCenters',
+        'B'               : 'computeB',
+        'maxDiff'         : 'computeMaxDiff',
+        'neighbours'      : 'computeNeighbours',
+        'nodesToCells'    : 'computeNodesToCells',
+        'nodesToCellsPtr' : 'computeNodesToCells',
+        'nodesToNodes'    : 'computeNodesToNodes',
+        'nodesToNodesPtr' : 'computeNodesToNodes',
+        'borderCells'     : 'computeBorder',
+        'borderEdgesRel'  : 'computeBorder',
+        'borderEdges'     : 'computeBorder',
+        'borderNodes'     : 'computeBorder',
+        'borderLengths'   : 'computeBorder',
+        'borderNormals'   : 'computeBorder',
+        'assemblyPlan'    : 'computeAssemblyPlan',
+        'matrixS'         : 'computeMatrixS',
+        'sparseMatrixS'   : 'computeMatrixS',
+    }
+    
+    __slots__ = ('N', 'M', 'nodes', 'cells', 'S', 'trS', 'nodeSets', 'edgeSets', 
+                 'nodePerm', 'cellPerm', 'stiffnessFactors', '_vizualizedNodes') + tuple('_' + name for name in _CACHED)
+    
+    def __init__(self, nodes, cells, S, trS, copy=True, nodeSets=None, edgeSets=None,
+                 dtype=np.double):
         """
         Параметры
         -------------
@@ -71,78 +157,246 @@ class MeshClass:
         copy : bool, optional
             Если True, то входные данные будут скопированы
             Иначе копирование будет происходить только при необходимости
+            
+        nodeSets, edgeSets : dict, optional
+            Именованные множества узлов и ребер сетки
+            
+        dtype : np.dtype, optional
+            Тип хранения вещественных данных сетки (nodes, S, trS
+            и вычисляемых по ним coords, centers, B, ...)
+            np.float32 позволяет вдвое сократить затраты памяти
+            Индексы всегда хранятся в np.int32
                     
         """
         
         
-        self.nodes = np.array(nodes, copy=copy, dtype=np.double)
+        self.nodes = np.array(nodes, copy=copy, dtype=dtype)
         self.cells = np.array(cells, copy=copy, dtype=np.int32)
-        self.S     = np.array(S,     copy=copy, dtype=np.double)
-        self.trS   = np.array(trS,   copy=copy, dtype=np.double)
+        self.S     = np.array(S,     copy=copy, dtype=dtype)
+        self.trS   = np.array(trS,   copy=copy, dtype=dtype)
         
         self.N = self.nodes.shape[0]
         self.M = self.cells.shape[0]
         
+        self.nodeSets = {name : np.array(ids, dtype=np.int32).reshape(-1)
+                         for name, ids in (nodeSets or {}).items()}
+        self.edgeSets = {name : np.array(edges, dtype=np.int32).reshape(-1, 2)
+                         for name, edges in (edgeSets or {}).items()}
         
-        self.coords = None
-        self.centers = None
-        self.maxDiff = None
-        self.neighbours = None
-        self.matrixS = None
-        
-        self.computeCoords()
+        for name in self._CACHED:
+            setattr(self, '_' + name, None)
+        self.nodePerm = None
+        self.cellPerm = None
+        self.stiffnessFactors = {}
         
         self._vizualizedNodes = self.nodes
         
+    
+    @property
+    def NEIGHNONE(self):
+        return self.M
+        
+    def dropCaches(self, *names):
+        """
+        Удаляет вычисленные производные данные сетки с именами names
+        (вместе с данными, вычисляемыми с ними одним методом),
+        по умолчанию - все, включая stiffnessFactors
+        (они удаляются и вместе с assemblyPlan, на который ссылаются)
+        
+        Удаленные данные будут вычислены заново при следующем обращении
+        """
+        
+        if not names or 'assemblyPlan' in names:
+            # stiffnessFactors ссылаются на assemblyPlan:
+            self.stiffnessFactors.clear()
+        if not names:
+            names = self._CACHED
         
+        methods = {self._CACHED[name] for name in names}
+        for name, method in self._CACHED.items():
+            if method in methods:
+                setattr(self, '_' + name, None)
+                
+    def memoryReport(self):
+        """
+        Возвращает словарь name -> количество байт, занимаемых данными сетки:
+        исходными (nodes, cells, S, trS, nodeSets, edgeSets) и вычисленными 
+        производными (см. dropCaches); невычисленные данные не включаются
+        """
+        
+        # Общие объекты (например, AssemblyPlan в stiffnessFactors) учитываются один раз:
+        seen = set()
+        
+        report = {name : _nbytes(getattr(self, name), seen) 
+                  for name in ('nodes', 'cells', 'S', 'trS', 'nodeSets', 'edgeSets')}
+        for name in self._CACHED:
+            value = getattr(self, '_' + name)
+            if value is not None:
+                report[name] = _nbytes(value, seen)
+        if self.stiffnessFactors:
+            report['stiffnessFactors'] = _nbytes(self.stiffnessFactors, seen)
+            
+        return report
+    
+    
     # Дополнительные данные о сетке:
         
     def computeCoords(self):
-        if self.coords is None:
-            self.coords = self.nodes[self.cells]
+        if self._coords is None:
+            self._coords = self.nodes[self.cells]
         
     def computeCenters(self):
-        if self.centers is None:
-            self.computeCoords()
-            self.centers = getCenter(self.coords)
+        if self._centers is None:
+            self._centers = getCenter(self.coords)
+    
+    def computeB(self):
+        if self._B is None:
+            (X1, Y1), (X2, Y2), (X3, Y3), (X4, Y4) = self.coords.transpose(1, 2, 0)
+            self._B = np.stack((np.stack((Y2 - Y4, Y3 - Y1), axis=-1), 
+                               np.stack((X4 - X2, X1 - X3), axis=-1)), axis=1
+                             )/(2*self.S[:, np.newaxis, np.newaxis])
     
     def computeMaxDiff(self):
-        if self.maxDiff is None:
-            self.computeCenters()
-            self.maxDiff = np.abs(
+        if self._maxDiff is None:
+            self._maxDiff = np.abs(
                 self.centers[:, np.newaxis, :] - self.coords
             ).max(axis=(0, 1))
         
     def computeNeighbours(self):
-        if self.neighbours is None:
-            nodes_to_cells = [[] for _ in range(self.N)]
-            for cell_id, cell in enumerate(self.cells):
-                nodes_to_cells[cell[0]].append([0, cell_id])
-                nodes_to_cells[cell[1]].append([1, cell_id])
-                nodes_to_cells[cell[2]].append([2, cell_id])
-                nodes_to_cells[cell[3]].append([-1, cell_id])
+        if self._neighbours is None:
+            # Ребро (n_i, n_i+1) элемента совпадает с ребром (n_j+1, n_j) соседа,
+            # поэтому после сортировки ребер по ключам без учета направления
+            # соседние ребра оказываются рядом:
+            start = self.cells.astype(np.int64).ravel()
+            end   = np.roll(self.cells, -1, axis=1).astype(np.int64).ravel()
+            keys = np.minimum(start, end)*self.N + np.maximum(start, end)
+            
+            order = np.argsort(keys)
+            first, second = order[:-1], order[1:]
+            isPair = (keys[first] == keys[second]) & (start[first] == end[second])
+            first, second = first[isPair], second[isPair]
+            
+            neighbours = np.full(shape=(4*self.M, ), fill_value=self.NEIGHNONE, 
+                                 dtype=np.int32)
+            neighbours[first]  = second//4
+            neighbours[second] = first//4
+            self._neighbours = neighbours.reshape(self.M, 4)
+        
+    def computeNodesToCells(self):
+        if self._nodesToCells is None:
+            order = np.argsort(self.cells.ravel(), kind='stable')
+            self._nodesToCells = (order//4).astype(np.int32)
+            self._nodesToCellsPtr = np.concatenate(([0], np.cumsum(
+                np.bincount(self.cells.ravel(), minlength=self.N)
+            ))).astype(np.int32)
+        
+    def computeNodesToNodes(self):
+        if self._nodesToNodes is None:
+            # Ребра элементов без учета направления:
+            start = self.cells.ravel()
+            end   = np.roll(self.cells, -1, axis=1).ravel()
+            keys = np.unique(np.concatenate((start.astype(np.int64)*self.N + end, 
+                                             end.astype(np.int64)*self.N + start)))
+            rows, cols = np.divmod(keys, self.N)
+            
+            self._nodesToNodes = cols.astype(np.int32)
+            self._nodesToNodesPtr = np.concatenate(([0], np.cumsum(
+                np.bincount(rows, minlength=self.N)
+            ))).astype(np.int32)
+        
+    def computeBorder(self):
+        if self._borderEdges is None:
+            cells, edgesRel = np.where(self.neighbours == self.NEIGHNONE)
+            edges = np.stack((self.cells[cells,  edgesRel],
+                              self.cells[cells, (edgesRel + 1) % 4]), axis=-1)
+            
+            (X1, Y1), (X2, Y2) = self.nodes[edges].transpose(1, 2, 0)
+            lengths = np.hypot(X2 - X1, Y2 - Y1)
+            
+            self._borderCells = cells.astype(np.int32)
+            self._borderEdgesRel = edgesRel.astype(np.int32)
+            self._borderEdges = edges
+            self._borderNodes = np.unique(edges)
+            self._borderLengths = lengths
+            self._borderNormals = np.stack((Y2 - Y1, X1 - X2), axis=-1)/lengths[:, np.newaxis]
+    
+    def getNodes(self, nodes):
+        """
+        Возвращает индексы узлов, заданных:
+            именем множества узлов из nodeSets или ребер из edgeSets,
+            маской или списком индексов узлов
+            или функцией nodes(a) -> маска, вычисляемой только на граничных узлах
+        """
+        
+        if isinstance(nodes, str):
+            if nodes in self.nodeSets:
+                return self.nodeSets[nodes]
+            if nodes in self.edgeSets:
+                return np.unique(self.edgeSets[nodes])
+            raise KeyError(f"Unknown node or edge set '{nodes}'")
+            
+        if callable(nodes):
+            self.computeBorder()
+            return self.borderNodes[nodes(self.nodes[self.borderNodes])]
             
-            self.NEIGHNONE = self.M
-            self.neighbours = np.full_like(self.cells, self.NEIGHNONE, dtype=np.int32)
-            for node_to_cells in nodes_to_cells:
-                for (ind1, cell_id1), (ind2, cell_id2) \
-                in combinations(node_to_cells, 2):
-                    if self.cells[cell_id1, ind1 + 1] == \
-                       self.cells[cell_id2, ind2 - 1]:
-                        self.neighbours[cell_id1, ind1]     = cell_id2
-                        self.neighbours[cell_id2, ind2 - 1] = cell_id1
-        
-    def computeMatrixS(self):
-        if self.matrixS is None:
-            self.matrixS = np.zeros(shape=(self.N, self.N), dtype=np.double)
-            k = np.array([[2.0, 1.0, 0.5, 1.0], 
-                          [1.0, 2.0, 1.0, 0.5], 
-                          [0.5, 1.0, 2.0, 1.0], 
-                          [1.0, 0.5, 1.0, 2.0]])/6
-            for cell, S, trS in zip(self.cells, self.S, self.trS):
-                S_loc = k*(S + trS[:, np.newaxis] + trS[np.newaxis, :])
-                for i in range(4):
-                    self.matrixS[cell, cell[i]] += S_loc[i]
+        nodes = np.asarray(nodes)
+        return np.where(nodes)[0] if nodes.dtype == bool else nodes.ravel()
+        
+    def getBorderEdges(self, edges):
+        """
+        Возвращает индексы граничных ребер (в списке borderEdges), заданных:
+            именем множества ребер из edgeSets или узлов из nodeSets
+            (ребра, обе вершины которых принадлежат множеству)
+            или функцией edges(a) -> маска, истинной на обеих вершинах ребра
+        """
+        
+        self.computeBorder()
+        
+        if callable(edges):
+            isBorder = edges(self.nodes[self.borderEdges])
+            return np.where(isBorder.all(axis=-1))[0]
+        
+        if isinstance(edges, str) and edges in self.edgeSets:
+            # Ребра множества ищутся среди граничных без учета направления:
+            keys = np.sort(self.borderEdges, axis=-1).astype(np.int64)@[self.N, 1]
+            order = np.argsort(keys)
+            setKeys = np.sort(self.edgeSets[edges], axis=-1).astype(np.int64)@[self.N, 1]
+            pos = np.searchsorted(keys, setKeys, sorter=order).clip(max=keys.size - 1)
+            return np.unique(order[pos[keys[order[pos]] == setKeys]])
+        
+        isSelected = np.zeros(shape=(self.N, ), dtype=bool)
+        isSelected[self.getNodes(edges)] = True
+        return np.where(isSelected[self.borderEdges].all(axis=-1))[0]
+            
+    def computeAssemblyPlan(self):
+        if self._assemblyPlan is None:
+            self._assemblyPlan = AssemblyPlan(self.cells, self.N)
+        
+    def computeMatrixS(self, sparse=False, workers=None, executor='thread'):
+        """
+        Рассчитывает матрицу площадей сетки
+        Если sparse = True, то matrixS - матрица в формате scipy.sparse.csr_matrix,
+        иначе (default) - плотная матрица
+        
+        Матрица собирается один раз и хранится в формате CSR (sparseMatrixS), 
+        плотная форма получается из нее при необходимости
+        
+        Если workers > 1, то сборка выполняется параллельно 
+        в пуле executor (см. AssemblyPlan.assembleDataParallel)
+        """
+        
+        if self._sparseMatrixS is None:
+            if workers is not None and workers > 1:
+                data = self.assemblyPlan.assembleDataParallel(
+                    getLocalS, [self.S, self.trS], workers, executor)
+            else:
+                data = self.assemblyPlan.assembleData(getLocalS(self.S, self.trS))
+                
+            self._sparseMatrixS = self.assemblyPlan.toMatrix(data, sparse=True)
+            self._matrixS = None
+            
+        if self._matrixS is None or issparse(self._matrixS) != sparse:
+            self._matrixS = self._sparseMatrixS if sparse else self._sparseMatrixS.toarray()
         
         
     def getTriangleRel(self, a, cell_id):
@@ -167,6 +421,117 @@ class MeshClass:
         return self.cells[cell_id, self.getTriangleRel(a, cell_id)]
         
         
+    # Перенумерация узлов и элементов:
+    
+    def renumbered(self, nodes='rcm', cells='hilbert'):
+        """
+        Возвращает копию сетки с перенумерованными узлами и элементами
+        
+        
+        Параметры
+        -------------
+        
+        nodes : {'rcm', None} or array-like, optional
+            'rcm' (default) - обратный алгоритм Катхилла-Макки по графу узлов,
+            уменьшающий ширину ленты глобальных матриц
+            Также может быть задан порядок (новый номер -> старый номер)
+            
+        cells : {'hilbert', 'morton', 'nodes', None} or array-like, optional
+            'hilbert' (default), 'morton' - порядок центров элементов 
+            вдоль кривой, заполняющей пространство (см. getCurveOrder)
+            'nodes' - по наименьшему новому номеру узла элемента
+            Также может быть задан порядок (новый номер -> старый номер)
+            
+        Множества узлов и ребер и вычисленные производные данные элементов 
+        (coords, centers, B, maxDiff, neighbours) переносятся в новую нумерацию,
+        остальные производные данные вычисляются заново при обращении
+        
+        Перестановки сохраняются в nodePerm и cellPerm новой сетки 
+        (в терминах исходной сетки, если она сама была перенумерована)
+        и используются toOriginalNodes и toOriginalCells
+        """
+        
+        if isinstance(nodes, str) and nodes == 'rcm':
+            nodePerm = getRCMOrder(self.assemblyPlan.indptr, self.assemblyPlan.indices)
+        elif nodes is None:
+            nodePerm = np.arange(self.N)
+        else:
+            nodePerm = np.asarray(nodes, dtype=np.int64)
+        
+        inverse = np.empty_like(nodePerm)
+        inverse[nodePerm] = np.arange(self.N)
+        newCells = inverse[self.cells]
+        
+        if isinstance(cells, str) and cells in ('hilbert', 'morton'):
+            cellPerm = getCurveOrder(self.centers, cells)
+        elif isinstance(cells, str) and cells == 'nodes':
+            cellPerm = np.argsort(newCells.min(axis=-1), kind='stable')
+        elif cells is None:
+            cellPerm = np.arange(self.M)
+        else:
+            cellPerm = np.asarray(cells, dtype=np.int64)
+        
+        mesh = MeshClass(self.nodes[nodePerm], newCells[cellPerm], 
+                         self.S[cellPerm], self.trS[cellPerm], copy=False,
+                         nodeSets={name : inverse[ids]   for name, ids   in self.nodeSets.items()},
+                         edgeSets={name : inverse[edges] for name, edges in self.edgeSets.items()},
+                         dtype=self.nodes.dtype)
+        
+        for name in ('coords', 'centers', 'B'):
+            if getattr(self, '_' + name) is not None:
+                setattr(mesh, name, getattr(self, name)[cellPerm])
+        mesh.maxDiff = self._maxDiff
+        
+        if self._neighbours is not None:
+            cellsInverse = np.empty(shape=(self.M + 1, ), dtype=np.int32)
+            cellsInverse[cellPerm] = np.arange(self.M)
+            cellsInverse[self.NEIGHNONE] = mesh.NEIGHNONE
+            mesh.neighbours = cellsInverse[self.neighbours[cellPerm]]
+        
+        mesh.nodePerm = nodePerm if self.nodePerm is None else self.nodePerm[nodePerm]
+        mesh.cellPerm = cellPerm if self.cellPerm is None else self.cellPerm[cellPerm]
+        return mesh
+    
+    def partition(self, parts, method='inertial'):
+        """
+        Разбивает элементы сетки на parts подобластей 
+        (см. FEM.mesh.partition.partitionMesh)
+        
+        Возвращает Partition
+        """
+        
+        return partitionMesh(self, parts, method)
+    
+    def toOriginalNodes(self, values):
+        """
+        Переводит значения в узлах values : shape=(N, ...) или перемещения 
+        values : shape=(2N, ...) перенумерованной сетки в исходную нумерацию узлов
+        """
+        
+        if self.nodePerm is None:
+            return values
+        
+        values = np.asarray(values)
+        blocks = values.reshape((self.N, -1) + values.shape[1:])
+        result = np.empty_like(blocks)
+        result[self.nodePerm] = blocks
+        return result.reshape(values.shape)
+    
+    def toOriginalCells(self, values):
+        """
+        Переводит значения на элементах values : shape=(M, ...) 
+        перенумерованной сетки в исходную нумерацию элементов
+        """
+        
+        if self.cellPerm is None:
+            return values
+        
+        values = np.asarray(values)
+        result = np.empty_like(values)
+        result[self.cellPerm] = values
+        return result
+        
+        
     # Методы для визуализации сетки и значений функции на ней:
     
     def shiftNodes(self, U):
@@ -223,17 +588,69 @@ class MeshClass:
         plotMeshNodes(self._vizualizedNodes, self.cells, values, **kwargs)
         
         
-def meshFrom(inputstream=None, name="doc/meshes/test.k", reader=None, logger=None):
+
+
+def _cached(name, compute):
+    """
+    Создает свойство name класса MeshClass, значение которого хранится 
+    в слоте _name и вычисляется методом compute при первом обращении
+    """
+    
+    slot = '_' + name
+    
+    def getter(self):
+        if getattr(self, slot) is None:
+            getattr(self, compute)()
+        return getattr(self, slot)
+    
+    def setter(self, value):
+        setattr(self, slot, value)
+        
+    return property(getter, setter)
+
+for _name, _compute in MeshClass._CACHED.items():
+    setattr(MeshClass, _name, _cached(_name, _compute))
+    
+
+def _nbytes(value, seen=None):
+    """
+    Возвращает количество байт, занимаемых массивами в value
+    Объекты, чьи id уже есть в seen, не учитываются
+    """
+    
+    if seen is None:
+        seen = set()
+    if value is None or id(value) in seen:
+        return 0
+    seen.add(id(value))
+    
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if issparse(value):
+        return sum(_nbytes(getattr(value, name, None), seen) for name in ('data', 'indices', 'indptr'))
+    if isinstance(value, dict):
+        return sum(_nbytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return _nbytes(vars(value), seen)
+    return 0
+        
+
+
+def meshFrom(inputstream=None, name="doc/meshes/test.k", reader=None, logger=None, 
+             dtype=np.double, cache=False, bulk=False, progress=None):
         """
         Параметры
         -------------
        
         inputstream : iterable, optional
             Поток входных данных, с которыми будет работать reader
-            Если None (default), то inputstream = open(name)
+            Если None (default), то читается файл name
             
         name : str, optional
-            Если inputstream = None, то устанавливается inputstream = open(name)
+            Если inputstream = None, то файл name читается кусками 
+            (см. StreamReaderBase.readfile), в том числе сжатый gzip, xz или bzip2
             
         reader : StreamReaderBase subclass, optional
             Класс, которым будет осуществляться обработка входных данных input
@@ -244,15 +661,142 @@ def meshFrom(inputstream=None, name="doc/meshes/test.k", reader=None, logger=Non
         logger : logging-type object, optional
             Лог для класса обработки входных данных
             Если None (default), то используется лог по умолчанию у reader
+            
+        dtype : np.dtype, optional
+            Тип хранения вещественных данных сетки (см. MeshClass)
+            
+        cache : bool or str, optional
+            Если True или путь к файлу и inputstream = None, то сетка загружается
+            из бинарного файла (см. loadMesh), по умолчанию name + '.kcache',
+            если он создан для текущего содержимого файла name
+            Иначе сетка считывается из name, и файл создается заново
+            (вместе с центрами и соседями элементов)
+            
+        bulk : bool, optional
+            Если True и reader = None, то KFileReader разбирает блоки узлов 
+            и элементов целиком средствами NumPy, накапливая их в растущих 
+            массивах с пиковым расходом памяти, близким к размеру сетки 
+            (см. KFileReader)
+            Иначе (default) входные данные читаются построчно
+            
+        progress : callable, optional
+            Вызывается по мере чтения файла name как progress(done, total)
+            (см. FEM.mesh.reader.readChunks)
                     
         """
         
-        if inputstream is None:
-            inputstream = open(name)
+        if cache and inputstream is None:
+            path = name + CACHE_SUFFIX if cache is True else cache
+            mesh = _loadCached(path, name, dtype)
+            if mesh is not None:
+                return mesh
             
+            mesh = meshFrom(name=name, reader=reader, logger=logger, dtype=dtype, 
+                            bulk=bulk, progress=progress)
+            try:
+                saveMesh(mesh, path, source=getFileKey(name))
+            except OSError as error:
+                warnings.warn(f"Unable to create mesh cache '{path}': {error}", RuntimeWarning)
+            return mesh
+        
         if reader is None:
-            reader = KFileReader(logger)
+            reader = KFileReader(logger, bulk=bulk)
             
-        reader.readstream(inputstream)
-        return MeshClass(**reader.pop(), copy=False)
-        
\ No newline at end of file
+        if inputstream is None:
+            reader.readfile(name, progress=progress)
+        else:
+            reader.readstream(inputstream)
+        return MeshClass(**reader.pop(), copy=False, dtype=dtype)
+        
+        
+        
+# Бинарный формат сетки:
+
+CACHE_SUFFIX = '.kcache'
+
+def saveMesh(mesh, path, derived=('centers', 'neighbours'), source=None):
+    """
+    Сохраняет сетку mesh в бинарный файл path (см. FEM.mesh.binary.writeArrays)
+    
+    
+    Параметры
+    -------------
+    
+    derived : iterable of str, optional
+        Имена производных данных сетки (см. MeshClass.dropCaches), которые
+        вычисляются и сохраняются вместе с исходными
+        
+    source : dict, optional
+        Ключ исходного файла сетки (см. FEM.mesh.binary.getFileKey),
+        по которому meshFrom проверяет актуальность файла
+    """
+    
+    arrays = dict(nodes=mesh.nodes, cells=mesh.cells, S=mesh.S, trS=mesh.trS)
+    arrays.update({'nodeSets/' + name : ids   for name, ids   in mesh.nodeSets.items()})
+    arrays.update({'edgeSets/' + name : edges for name, edges in mesh.edgeSets.items()})
+    arrays.update({name : getattr(mesh, name) for name in derived})
+    
+    writeArrays(path, arrays, dict(source=source, derived=list(derived)))
+    
+def loadMesh(path, mmap=True, dtype=None):
+    """
+    Загружает сетку из бинарного файла path, созданного saveMesh
+    
+    Если mmap = True (default), то массивы сетки отображаются в память
+    без копирования и считываются с диска по мере обращения к ним
+    (и доступны только для чтения)
+    Если задан dtype, отличный от сохраненного, то вещественные данные
+    преобразуются к нему
+    """
+    
+    mesh, _ = _loadMesh(path, mmap, dtype)
+    return mesh
+    
+def _loadMesh(path, mmap=True, dtype=None):
+    arrays, meta = readArrays(path, mmap)
+    
+    dtype = arrays['nodes'].dtype if dtype is None else np.dtype(dtype)
+    sets = {kind : {name.split('/', 1)[1] : array for name, array in arrays.items() 
+                    if name.startswith(kind + '/')}
+            for kind in ('nodeSets', 'edgeSets')}
+    
+    mesh = MeshClass(arrays['nodes'], arrays['cells'], arrays['S'], arrays['trS'], 
+                     copy=False, dtype=dtype, **sets)
+    for name in meta.get('derived', []):
+        array = arrays[name]
+        setattr(mesh, name, array.astype(dtype, copy=False) if array.dtype.kind == 'f' else array)
+        
+    return mesh, meta
+    
+def _loadCached(path, source, dtype):
+    """
+    Загружает сетку из файла path, если он создан для текущего 
+    содержимого файла source, иначе возвращает None
+    """
+    
+    if not os.path.isfile(path):
+        return None
+    
+    try:
+        mesh, meta = _loadMesh(path, dtype=dtype)
+    except (ValueError, KeyError, OSError):
+        return None
+    
+    # Сначала сравниваются размер и время изменения, 
+    # и только при несовпадении времени - хэши содержимого:
+    cached, key = meta.get('source') or {}, getFileKey(source, content=False)
+    if cached.get('size') != key['size']:
+        return None
+    if cached.get('mtime') != key['mtime']:
+        key = getFileKey(source)
+        if cached.get('sha1') != key['sha1']:
+            return None
+        
+        # Содержимое не изменилось: ключ обновляется, 
+        # чтобы не вычислять хэш при каждой загрузке
+        try:
+            saveMesh(mesh, path, derived=meta.get('derived', []), source=key)
+        except OSError as error:
+            warnings.warn(f"Unable to update mesh cache '{path}': {error}", RuntimeWarning)
+    
+    return mesh
@@ -0,0 +1,117 @@
+__all__ = ["Partition", "partitionMesh"]
+
+
+import numpy as np
+
+
+class Partition:
+    """
+    Класс для хранения разбиения элементов сетки на подобласти
+
+
+    Атрибуты
+    ------------
+
+    parts : int
+        Количество подобластей
+    cellParts : np.array(shape=(M, ), dtype=np.int32)
+        Номер подобласти каждого элемента сетки
+    cells : list of np.array(dtype=np.int)
+        Упорядоченные индексы элементов каждой подобласти
+    nodes : list of np.array(dtype=np.int)
+        Упорядоченные индексы узлов каждой подобласти: nodes[p][i] -
+        глобальный номер i-го локального узла подобласти p
+    interface : np.array(dtype=np.int)
+        Упорядоченные индексы узлов, принадлежащих нескольким подобластям
+    """
+
+    def __init__(self, mesh, cellParts):
+        """
+        Параметры
+        -------------
+
+        mesh : MeshClass
+            Сетка
+
+        cellParts : np.array(shape=(M, ), dtype=np.int)
+            Номер подобласти каждого элемента сетки
+        """
+
+        self.cellParts = np.asarray(cellParts, dtype=np.int32)
+        self.parts = int(self.cellParts.max()) + 1
+
+        order = np.argsort(self.cellParts, kind='stable')
+        bounds = np.searchsorted(self.cellParts[order], np.arange(self.parts + 1))
+        self.cells = [order[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+        self.nodes = [np.unique(mesh.cells[cells]) for cells in self.cells]
+
+        counts = np.bincount(np.concatenate(self.nodes), minlength=mesh.N)
+        self.interface = np.where(counts > 1)[0]
+
+    def getNodes(self, mesh, part, overlap=0):
+        """
+        Возвращает индексы узлов подобласти part, расширенной на overlap
+        слоев элементов, соседних по узлам
+        """
+
+        isNode = np.zeros(shape=(mesh.N, ), dtype=bool)
+        isNode[self.nodes[part]] = True
+        for _ in range(overlap):
+            isNode[mesh.cells[isNode[mesh.cells].any(axis=-1)]] = True
+        return np.where(isNode)[0]
+
+
+def partitionMesh(mesh, parts, method='inertial'):
+    """
+    Разбивает элементы сетки mesh на parts подобластей с примерно равным
+    количеством элементов рекурсивной бисекцией множества центров элементов
+
+
+    Параметры
+    -------------
+
+    parts : int
+        Количество подобластей
+
+    method : {'inertial', 'coordinate'}, optional
+        'inertial' (default) - разрезы перпендикулярны главной оси инерции
+        центров элементов части
+        'coordinate' - разрезы перпендикулярны оси координат,
+        вдоль которой часть имеет наибольший размер
+
+    Возвращает Partition
+    """
+
+    if method not in ('inertial', 'coordinate'):
+        raise ValueError(f"Unknown method '{method}'; Expected 'inertial' or 'coordinate'")
+
+    cellParts = np.zeros(shape=(mesh.M, ), dtype=np.int32)
+    _bisect(mesh.centers, np.arange(mesh.M), 0, parts, method, cellParts)
+    return Partition(mesh, cellParts)
+
+
+def _bisect(centers, cells, first, parts, method, cellParts):
+    """
+    Рекурсивно разбивает элементы cells на подобласти first, ..., first + parts - 1
+    """
+
+    if parts == 1:
+        cellParts[cells] = first
+        return
+
+    points = centers[cells]
+    if method == 'inertial':
+        points = points - points.mean(axis=0)
+        _, vectors = np.linalg.eigh(points.T@points)
+        direction = vectors[:, -1]
+    else:
+        direction = np.eye(2)[np.argmax(points.max(axis=0) - points.min(axis=0))]
+
+    # Части делятся пропорционально количеству подобластей в них:
+    left = parts//2
+    split = int(round(len(cells)*left/parts))
+    order = np.argpartition(points@direction, split) if 0 < split < len(cells) \
+            else np.arange(len(cells))
+
+    _bisect(centers, cells[order[:split]], first, left, method, cellParts)
+    _bisect(centers, cells[order[split:]], first + left, parts - left, method, cellParts)
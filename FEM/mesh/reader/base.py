@@ -1,7 +1,122 @@
-__all__ = ["StreamReaderBase"]
+__all__ = ["StreamReaderBase", "readChunks"]
 
 
+import bz2
+import gzip
 import logging
+import lzma
+import mmap
+import os
+
+
+# Сигнатуры сжатых файлов:
+_COMPRESSED = ((b'\x1f\x8b', gzip.open), 
+               (b'\xfd7zXZ\x00', lzma.open), 
+               (b'BZh', bz2.open))
+
+
+def readChunks(source, chunkSize=1 << 22, encoding='utf-8', errors='replace', progress=None):
+    """
+    Генератор, читающий источник source кусками текста примерно по chunkSize
+    байт, каждый из которых заканчивается концом строки
+    
+    
+    Параметры
+    -------------
+    
+    source : str, os.PathLike, file-like object или iterable of str
+        Путь к файлу, сжатому gzip, xz или bzip2 (определяется по содержимому)
+        либо несжатому (читается через mmap), открытый файл (текстовый
+        или двоичный) или поток строк
+        
+    encoding, errors : str, optional
+        Кодировка двоичных данных и обработка ошибок декодирования (см. bytes.decode)
+        
+    progress : callable, optional
+        Вызывается после каждого куска как progress(done, total):
+        количество прочитанных байт файла (для сжатых - сжатых байт,
+        для потока строк - символов) и размер файла (None, если неизвестен)
+    """
+    
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as raw:
+            total = os.fstat(raw.fileno()).st_size
+            head = raw.read(6)
+            raw.seek(0)
+            
+            for magic, opener in _COMPRESSED:
+                if head.startswith(magic):
+                    with opener(raw) as stream:
+                        yield from _readStream(stream, chunkSize, encoding, errors,
+                                               progress, raw.tell, total)
+                    return
+                
+            if total > 0:
+                with mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    yield from _readMapped(view, chunkSize, encoding, errors, progress)
+                    
+    elif hasattr(source, 'read'):
+        yield from _readStream(source, chunkSize, encoding, errors, progress, None, None)
+        
+    else:
+        lines, size, done = [], 0, 0
+        for line in source:
+            lines.append(line if line.endswith('\n') else line + '\n')
+            size += len(line)
+            if size >= chunkSize:
+                yield ''.join(lines)
+                done += size
+                lines, size = [], 0
+                if progress is not None:
+                    progress(done, None)
+        if lines:
+            yield ''.join(lines)
+            if progress is not None:
+                progress(done + size, None)
+            
+
+def _readMapped(view, chunkSize, encoding, errors, progress):
+    
+    begin, size = 0, len(view)
+    while begin < size:
+        end = min(begin + chunkSize, size)
+        if end < size:
+            newline = view.rfind(b'\n', begin, end)
+            if newline == -1:
+                newline = view.find(b'\n', end)
+            end = size if newline == -1 else newline + 1
+            
+        yield view[begin:end].decode(encoding, errors)
+        
+        # Прочитанные страницы файла больше не нужны в памяти процесса:
+        if hasattr(view, 'madvise'):
+            released = begin - begin % mmap.PAGESIZE
+            view.madvise(mmap.MADV_DONTNEED, released, end - released)
+        begin = end
+        if progress is not None:
+            progress(begin, size)
+            
+
+def _readStream(stream, chunkSize, encoding, errors, progress, position, total):
+    
+    tail, done = None, 0
+    while True:
+        data = stream.read(chunkSize)
+        if not data:
+            break
+        done += len(data)
+        
+        data = data if tail is None else tail + data
+        newline = data.rfind(b'\n' if isinstance(data, bytes) else '\n')
+        tail, data = data[newline + 1:], data[:newline + 1]
+        
+        if data:
+            yield data.decode(encoding, errors) if isinstance(data, bytes) else data
+        if progress is not None:
+            progress(done if position is None else position(), total)
+            
+    if tail:
+        yield tail.decode(encoding, errors) if isinstance(tail, bytes) else tail
 
 
 class StreamReaderBase:
@@ -45,7 +160,8 @@ class StreamReaderBase:
         """
     
         self.__lineNumber += 1
-        self._logger.debug(f"Reading line number {self.__lineNumber}")
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"Reading line number {self.__lineNumber}")
         self._apply(line)
         
     def readstream(self, stream):
@@ -60,6 +176,25 @@ class StreamReaderBase:
                 break
             
 
+    def readfile(self, source, chunkSize=1 << 22, progress=None, encoding='utf-8'):
+        """
+        Читает файл или поток source кусками (см. readChunks), 
+        не загружая его в память целиком
+        """
+        
+        chunks = readChunks(source, chunkSize, encoding, progress=progress)
+        try:
+            for chunk in chunks:
+                self._readchunk(chunk)
+                
+                if self._isEnd is True:
+                    break
+        finally:
+            chunks.close()
+            
+        self._finish()
+            
+
     def get(self):
         """
         Возвращает накопленные данные, если они готовы
@@ -116,6 +251,11 @@ class StreamReaderBase:
         pass
         
     
+    def _readchunk(self, text):
+        StreamReaderBase.readstream(self, text.splitlines())
+    def _finish(self):
+        pass
+    
     def _apply(self, line):
         pass
     def _end_reader(self, line):
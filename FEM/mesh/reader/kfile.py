@@ -1,11 +1,84 @@
 __all__ = ["KFileReader"]
 
 
+import io
+import re
+import warnings
+
+import numpy as np
+
 from functools import wraps
 
 
 from .base import StreamReaderBase
-from FEM.geometry import getS
+from FEM.geometry import getS, orderQuads
+
+
+# Количество элементов, обрабатываемых за раз при извлечении данных режима bulk:
+_EXTRACT_SIZE = 1 << 16
+
+# Поддерживаемые блоки множеств: ключевое слово -> (множество узлов, карты диапазонов)
+_SETS = {"*SET_NODE_LIST"                : (True,  False),
+         "*SET_NODE_LIST_TITLE"          : (True,  False),
+         "*SET_NODE_LIST_GENERATE"       : (True,  True),
+         "*SET_NODE_LIST_GENERATE_TITLE" : (True,  True),
+         "*SET_SEGMENT"                  : (False, False),
+         "*SET_SEGMENT_TITLE"            : (False, False)}
+
+_STAR = re.compile(r'\*[^\n]*')
+_NONSPACE = re.compile(r'\S')
+
+
+def _findKeywords(text):
+    """
+    Возвращает пары (начало, конец) строк ключевых слов вида '*KEYWORD' в тексте text
+    """
+    
+    # Поиск '*' с проверкой начала строки быстрее многострочного регулярного выражения:
+    keywords = []
+    for match in _STAR.finditer(text):
+        start = text.rfind('\n', 0, match.start()) + 1
+        if not text[start:match.start()].strip():
+            keywords.append((start, match.end()))
+    return keywords
+
+
+class _Buffer:
+    """
+    Растущий массив строк shape=(size, *shape) типа dtype
+    Память расширяется через realloc (ndarray.resize), что для больших массивов 
+    обычно не требует копирования, так что пиковый расход памяти близок
+    к размеру данных
+    """
+    
+    def __init__(self, shape, dtype):
+        self.__data = np.empty(shape=(0, ) + shape, dtype=dtype)
+        self.__isShared = False
+        self.size = 0
+        
+    def append(self, rows):
+        end = self.size + len(rows)
+        if end > len(self.__data):
+            capacity = max(end, len(self.__data) + len(self.__data)//2, 1024)
+            if self.__isShared:
+                # Возвращенный массив не должен быть перемещен:
+                data = np.empty(shape=(capacity, ) + self.__data.shape[1:], dtype=self.__data.dtype)
+                data[:self.size] = self.__data[:self.size]
+                self.__data, self.__isShared = data, False
+            else:
+                self.__data.resize((capacity, ) + self.__data.shape[1:], refcheck=False)
+        self.__data[self.size:end] = rows
+        self.size = end
+        
+    def get(self):
+        """
+        Возвращает накопленный массив, освобождая неиспользованную память
+        """
+        
+        if len(self.__data) > self.size and not self.__isShared:
+            self.__data.resize((self.size, ) + self.__data.shape[1:], refcheck=False)
+        self.__isShared = True
+        return self.__data[:self.size]
 
 
 class KFileReader(StreamReaderBase):
@@ -14,14 +87,78 @@ class KFileReader(StreamReaderBase):
     из файлов в формате '*.k', сгенерированных в cao-Fidesys
     
     Возвращает данные в виде четырех списков: nodes, cells, S, trS
+    и двух словарей именованных множеств узлов и ребер nodeSets, edgeSets,
+    считанных из блоков *SET_NODE_LIST, *SET_NODE_LIST_GENERATE и *SET_SEGMENT 
+    (имя множества - заголовок из *_TITLE, либо его номер SID)
+    Остальные блоки *SET_* пропускаются с предупреждением
     Назначение и формат см. в описании класса MeshClass
     
+    В режиме bulk блоки *NODE и *ELEMENT_SHELL вырезаются из потока целиком
+    и разбираются средствами NumPy, номера узлов сопоставляются векторно,
+    а элементы упорядочиваются FEM.geometry.orderQuads; остальные блоки
+    читаются построчно. Результат совпадает с построчным чтением, но 
+    возвращается в виде массивов NumPy
+    
+    В режиме bulk поток (в том числе файл, сжатый gzip или xz, см. readfile)
+    читается кусками, а данные накапливаются в растущих массивах NumPy, 
+    так что пиковый расход памяти близок к размеру итоговой сетки
+    
     """
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, bulk=False, **kwargs):
+        """
+        Параметры
+        -------------
+        
+        bulk : bool, optional
+            Если True, то readstream и readfile работают в режиме bulk
+            Иначе (default) поток читается построчно
+        """
+        
+        self.__bulk = bulk
         super(KFileReader, self).__init__(*args, **kwargs)
         
         
+    def readstream(self, stream):
+        """
+        Читает поток данных stream
+        """
+        
+        if not self.__bulk:
+            return super(KFileReader, self).readstream(stream)
+        
+        self.readfile(stream)
+        
+    def _readchunk(self, text):
+        
+        if not self.__bulk:
+            return super(KFileReader, self)._readchunk(text)
+        
+        keywords = _findKeywords(text)
+        
+        # Начало куска продолжает текущий блок:
+        self.__readBlock(text[:keywords[0][0] if keywords else len(text)])
+        
+        bounds = [start for start, _ in keywords[1:]] + [len(text)]
+        for (start, end), bound in zip(keywords, bounds):
+            if self._isEnd:
+                break
+            
+            line = text[start:end].split('$')[0].strip()
+            isSet = line.startswith("*SET_")
+            if not isSet and line.find("NODE") != -1:
+                self.__startBlock('NODE')
+            elif not isSet and line.find("ELEMENT_SHELL") != -1:
+                self.__startBlock('ELEMENT_SHELL')
+            else:
+                self.__startBlock(None)
+                end = start
+            self.__readBlock(text[end:bound])
+            
+    def _finish(self):
+        if self.__bulk:
+            self.__startBlock(None)
+        
     def _reset(self):
         
         self.__nodes = []
@@ -32,17 +169,134 @@ class KFileReader(StreamReaderBase):
         self.__nNode = 0
         self.__nodes_id = {}
         
+        self.__nodeSets = {}
+        self.__edgeSets = {}
+        
+        # Данные, прочитанные в режиме bulk:
+        self.__block = None
+        self.__blockSize = 0
+        self.__nodeIds = _Buffer((), np.int64)
+        self.__nodeBlocks = _Buffer((2, ), np.double)
+        self.__cellIds = _Buffer((), np.int64)
+        self.__cellBlocks = _Buffer((4, ), np.int64)
+        
         self._isReady = True
         
         self._apply = self.__block_reader
         
     def _extract(self):
-        return {'nodes' : self.__nodes, 
-                'cells' : self.__cells, 
-                'S'     : self.__S, 
-                'trS'   : self.__trS}
+        if self.__bulk:
+            return self.__extractBulk()
+        
+        try:
+            nodeSets = {name : [self.__nodes_id[nid] for nid in ids]
+                        for name, ids in self.__nodeSets.items()}
+            edgeSets = {name : [[self.__nodes_id[nid] for nid in edge] for edge in edges]
+                        for name, edges in self.__edgeSets.items()}
+        except KeyError as error:
+            raise TypeError(f"Invalid node ID {error} in node or segment set")
+            
+        return {'nodes'    : self.__nodes, 
+                'cells'    : self.__cells, 
+                'S'        : self.__S, 
+                'trS'      : self.__trS,
+                'nodeSets' : nodeSets,
+                'edgeSets' : edgeSets}
     
     
+    def __extractBulk(self):
+        
+        nodes = self.__nodeBlocks.get()
+        ids = self.__nodeIds.get()
+        
+        # Как и в словаре номеров узлов, повторный номер замещает предыдущий:
+        order = np.argsort(ids, kind='stable')
+        sortedIds = ids[order]
+        del ids
+        
+        def getIndex(nids):
+            nids = np.asarray(nids, dtype=np.int64)
+            if len(sortedIds) == 0:
+                return np.zeros(nids.shape, dtype=np.int64), np.zeros(nids.shape, dtype=bool)
+            pos = np.maximum(np.searchsorted(sortedIds, nids, side='right') - 1, 0)
+            return order[pos], sortedIds[pos] == nids
+        
+        # Элементы обрабатываются частями, что бы не создавать 
+        # промежуточные массивы размера всей сетки:
+        cellIds, cellNodes = self.__cellIds.get(), self.__cellBlocks.get()
+        M = len(cellNodes)
+        cells = np.empty(shape=(M, 4), dtype=np.int32)
+        S, trS = np.empty(shape=(M, )), np.empty(shape=(M, 4))
+        for begin in range(0, M, _EXTRACT_SIZE):
+            part = slice(begin, begin + _EXTRACT_SIZE)
+            indx, isValid = getIndex(cellNodes[part])
+            if not isValid.all():
+                cellid = cellIds[part][np.argmin(isValid.all(axis=-1))]
+                raise TypeError(f"Invalid node ID in cell number {cellid}")
+            cells[part], S[part], trS[part] = orderQuads(nodes, indx)
+        del cellIds, cellNodes
+        
+        def getSet(nids):
+            indx, isValid = getIndex(np.array(nids, dtype=np.int64))
+            if not isValid.all():
+                raise TypeError(f"Invalid node ID '{np.asarray(nids)[~isValid][0]}' "
+                                f"in node or segment set")
+            return indx
+        
+        return {'nodes'    : nodes, 
+                'cells'    : cells, 
+                'S'        : S, 
+                'trS'      : trS,
+                'nodeSets' : {name : getSet(ids).reshape(-1)
+                              for name, ids in self.__nodeSets.items()},
+                'edgeSets' : {name : getSet(edges).reshape(-1, 2)
+                              for name, edges in self.__edgeSets.items()}}
+    
+    
+    def __startBlock(self, block):
+        # Завершает текущий блок и начинает блок block 
+        # (None - блок, читаемый построчно)
+        if self.__block is not None and self.__blockSize == 0:
+            self._logger.warning(f"No data in *{self.__block}* block found")
+            
+        self.__block, self.__blockSize = block, 0
+        if block is not None:
+            self._apply = self.__block_reader
+    
+    def __readBlock(self, text):
+        
+        if self.__block is None:
+            super(KFileReader, self)._readchunk(text)
+            return
+        
+        if self.__block == 'NODE':
+            data = self.__loadBlock(text, (0, 1, 2), np.double)
+            if data is not None:
+                self.__nodeIds.append(data[:, 0])
+                self.__nodeBlocks.append(data[:, 1:])
+        else:
+            data = self.__loadBlock(text, (0, 2, 3, 4, 5), np.int64)
+            if data is not None:
+                self.__cellIds.append(data[:, 0])
+                self.__cellBlocks.append(data[:, 1:])
+                
+        if data is not None:
+            self.__blockSize += len(data)
+    
+    def __loadBlock(self, text, columns, dtype):
+        # Считывает колонки columns всех строк текста text
+        if not _NONSPACE.search(text):
+            return None
+        try:
+            with warnings.catch_warnings():
+                # Текст может состоять только из комментариев:
+                warnings.simplefilter('ignore', UserWarning)
+                return np.loadtxt(io.StringIO(text), dtype=dtype, comments='$', 
+                                  usecols=columns, ndmin=2)
+        except ValueError as error:
+            raise TypeError(f"Unable to read *{self.__block}* block: {error}")
+            
+    
     def __skipSpaceDecarator(reader):
         
         @wraps(reader)
@@ -57,7 +311,13 @@ class KFileReader(StreamReaderBase):
     def __block_reader(self, line):
         
         if line[0] == '*':
-            if line.find("NODE") != -1:
+            keyword = line.split()[0]
+            if keyword in _SETS:
+                self.__startSet(keyword)
+            elif keyword.startswith("*SET_"):
+                self._logger.warning(f"Skipping unsupported set block '{line}'")
+                self._apply = self.__skipping
+            elif line.find("NODE") != -1:
                 self.__isInput = False
                 self._apply = self.__node_reader
             elif line.find("ELEMENT_SHELL") != -1:
@@ -79,6 +339,47 @@ class KFileReader(StreamReaderBase):
             self._apply = self.__block_reader
             self._apply(line)
             
+    def __startSet(self, keyword):
+        
+        isNodeSet, self.__isGenerate = _SETS[keyword]
+        self.__sets = self.__nodeSets if isNodeSet else self.__edgeSets
+        self.__setName = None
+        self.__isTitle = keyword.endswith("_TITLE")
+        self.__isHeader = True
+        self._apply = self.__set_reader
+        
+    @__skipSpaceDecarator
+    def __set_reader(self, line):
+        
+        if line[0] == '*':
+            self._apply = self.__block_reader
+            self._apply(line)
+            
+        elif self.__isTitle:
+            self.__setName = line
+            self.__isTitle = False
+            
+        elif self.__isHeader:
+            # Первая карта: SID DA1 DA2 DA3 DA4 ...
+            name = line.split()[0] if self.__setName is None else self.__setName
+            self.__currentSet = self.__sets.setdefault(name, [])
+            self.__isHeader = False
+            
+        elif self.__sets is self.__nodeSets and self.__isGenerate:
+            # Карты диапазонов номеров узлов B1BEG B1END B2BEG B2END ..., 0 - пустое поле:
+            bounds = line.split()
+            for begin, end in zip(bounds[0::2], bounds[1::2]):
+                if begin != '0':
+                    self.__currentSet.extend(str(nid) for nid in range(int(begin), int(end) + 1))
+            
+        elif self.__sets is self.__nodeSets:
+            # Карты по 8 номеров узлов, 0 - пустое поле:
+            self.__currentSet.extend(nid for nid in line.split() if nid != '0')
+            
+        else:
+            # Карты сегментов N1 N2 N3 N4 ..., в двумерном случае ребро - (N1, N2):
+            self.__currentSet.append(line.split()[0:2])
+            
     @__skipSpaceDecarator
     def __node_reader(self, line):
         
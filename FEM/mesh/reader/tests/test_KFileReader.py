@@ -1,3 +1,8 @@
+import gzip
+import lzma
+
+import numpy as np
+
 from FEM.mesh.reader import KFileReader
 
 
@@ -25,4 +30,79 @@ class TestKFileReader:
         reader = KFileReader()
         
         reader.readstream(open('doc/meshes/test.k'))
-        reader.pop()
\ No newline at end of file
+        reader.pop()
+        
+    def test_sets(self):
+        reader = KFileReader()
+        
+        reader.readstream(open('doc/meshes/sets_test.k'))
+        result = reader.pop()
+        
+        assert result['nodeSets'] == {'bottom' : [1, 6], '2' : [3, 4]}, "incorrect node sets"
+        assert result['edgeSets'] == {'top' : [[4, 5]]}, "incorrect segment sets"
+        
+    def test_setGenerate(self, tmp_path):
+        path = tmp_path/'generate.k'
+        path.write_text(open('doc/meshes/sets_test.k').read().replace('*END', 
+            '*SET_NODE_LIST_GENERATE\n'
+            '        7       0.0       0.0       0.0       0.0\n'
+            '        1         4         6         6\n'
+            '*SET_NODE_ADD\n'
+            '        8\n'
+            '        7\n'
+            '*END'))
+        
+        for bulk in (False, True):
+            reader = KFileReader(bulk=bulk)
+            reader.readstream(open(path))
+            result = reader.pop()
+            
+            assert list(result['nodeSets']['7']) == [1, 2, 3, 4, 6], "incorrect generated node set"
+            assert '8' not in result['nodeSets'], "unsupported set block is read"
+        
+    def test_bulk(self):
+        for name in ('mini_test', 'split_test', 'sets_test', 'test', 'kirsch/s1'):
+            reader, bulkReader = KFileReader(), KFileReader(bulk=True)
+            
+            reader.readstream(open(f'doc/meshes/{name}.k'))
+            bulkReader.readstream(open(f'doc/meshes/{name}.k'))
+            result, bulk = reader.pop(), bulkReader.pop()
+            
+            for key in ('nodes', 'cells', 'S', 'trS'):
+                assert np.array_equal(bulk[key], result[key]), f"bulk {key} differ in {name}"
+            for key in ('nodeSets', 'edgeSets'):
+                assert bulk[key].keys() == result[key].keys() and \
+                       all(np.array_equal(bulk[key][s], result[key][s]) for s in result[key]), \
+                       f"bulk {key} differ in {name}"
+                       
+    def test_streaming(self, tmp_path):
+        reader = KFileReader()
+        reader.readstream(open('doc/meshes/sets_test.k'))
+        result = reader.pop()
+        
+        data = open('doc/meshes/sets_test.k', 'rb').read()
+        (tmp_path/'mesh.k.gz').write_bytes(gzip.compress(data))
+        (tmp_path/'mesh.k.xz').write_bytes(lzma.compress(data))
+        
+        for source in ('doc/meshes/sets_test.k', tmp_path/'mesh.k.gz', tmp_path/'mesh.k.xz'):
+            calls = []
+            streamReader = KFileReader(bulk=True)
+            streamReader.readfile(source, chunkSize=40, progress=lambda done, total: calls.append((done, total)))
+            streamed = streamReader.pop()
+            
+            for key in ('nodes', 'cells', 'S', 'trS'):
+                assert np.array_equal(streamed[key], result[key]), f"streamed {key} differ for {source}"
+            assert all(np.array_equal(streamed['nodeSets'][s], result['nodeSets'][s]) 
+                       for s in result['nodeSets']), f"streamed node sets differ for {source}"
+            done, total = np.array(calls).T
+            assert len(calls) > 1 and (np.diff(done) >= 0).all() and (done <= total).all(), \
+                   f"incorrect progress for {source}"
+            
+        calls = []
+        lines = open('doc/meshes/sets_test.k').readlines()
+        streamReader = KFileReader(bulk=True)
+        streamReader.readfile(lines, chunkSize=40, progress=lambda done, total: calls.append((done, total)))
+        assert np.array_equal(streamReader.pop()['cells'], result['cells']), "streamed lines differ"
+        done, total = zip(*calls)
+        assert len(calls) > 1 and (np.diff(done) > 0).all() and done[-1] <= sum(map(len, lines)) \
+               and set(total) == {None}, "incorrect progress for lines"
@@ -0,0 +1,68 @@
+__all__ = ["getRCMOrder", "getCurveOrder", "getBandwidth"]
+
+
+import numpy as np
+
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import reverse_cuthill_mckee
+
+
+def getRCMOrder(indptr, indices):
+    """
+    Возвращает порядок узлов обратного алгоритма Катхилла-Макки
+    для графа, заданного симметричным шаблоном разреженности в формате CSR
+    (например, шаблоном AssemblyPlan), уменьшающий ширину ленты матриц
+
+    Возвращает np.array(shape=(N, ), dtype=np.int): order[i] - старый номер
+    узла, получающего номер i
+    """
+
+    N = len(indptr) - 1
+    graph = csr_matrix((np.ones(shape=(len(indices), ), dtype=np.int8), indices, indptr),
+                       shape=(N, N))
+    return reverse_cuthill_mckee(graph, symmetric_mode=True).astype(np.int64)
+
+
+def getCurveOrder(points, curve='hilbert', bits=16):
+    """
+    Возвращает порядок точек points : shape=(M, 2) вдоль кривой,
+    заполняющей пространство: 'hilbert' (Гильберта) или 'morton' (Z-порядок)
+
+    Точки округляются до узлов решетки 2^bits x 2^bits на их ограничивающем
+    прямоугольнике, так что близкие точки оказываются рядом в порядке обхода
+    """
+
+    low, high = points.min(axis=0), points.max(axis=0)
+    scale = (2**bits - 1)/np.maximum((high - low).max(), np.finfo(np.double).tiny)
+    x, y = ((points - low)*scale).astype(np.int64).T
+
+    if curve == 'morton':
+        keys = np.zeros_like(x)
+        for bit in range(bits):
+            keys |= ((x >> bit) & 1) << (2*bit + 1) | ((y >> bit) & 1) << (2*bit)
+    elif curve == 'hilbert':
+        n, keys = 1 << bits, np.zeros_like(x)
+        for bit in range(bits - 1, -1, -1):
+            s = 1 << bit
+            rx, ry = (x & s) > 0, (y & s) > 0
+            keys += s*s*((3*rx) ^ ry)
+
+            # Поворот квадранта:
+            flip = ~ry & rx
+            x = np.where(flip, n - 1 - x, x)
+            y = np.where(flip, n - 1 - y, y)
+            x, y = np.where(~ry, y, x), np.where(~ry, x, y)
+    else:
+        raise ValueError(f"Unknown curve '{curve}'; Expected 'hilbert' or 'morton'")
+
+    return np.argsort(keys, kind='stable')
+
+
+def getBandwidth(indptr, indices):
+    """
+    Возвращает ширину ленты max|i - j| матрицы с шаблоном разреженности
+    в формате CSR
+    """
+
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+    return int(np.abs(rows - indices).max(initial=0))
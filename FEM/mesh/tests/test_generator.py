@@ -0,0 +1,65 @@
+import numpy as np
+
+import FEM as fm
+from FEM.geometry import orderQuads
+from FEM.mesh import meshFrom
+from FEM.mesh.generator import rectangleMesh, plateWithHoleMesh, subdivide
+
+
+class TestGenerator:
+    
+    def test_orderQuads(self):
+        mesh = meshFrom(name='doc/meshes/test.k')
+        
+        # Произвольный порядок обхода элементов приводится к порядку KFileReader:
+        for cells in (mesh.cells[:, ::-1], np.roll(mesh.cells, 1, axis=1)):
+            ordered, S, trS = orderQuads(mesh.nodes, cells)
+            assert (ordered == mesh.cells).all(), "incorrect cells order"
+            assert np.allclose(S, mesh.S) and np.allclose(trS, mesh.trS), "incorrect areas"
+    
+    def test_rectangle(self):
+        mesh = rectangleMesh(2.0, 1.0, 4, 2)
+        
+        assert (mesh.N, mesh.M) == (15, 8), "incorrect mesh size"
+        assert np.allclose(mesh.S, 0.25) and np.allclose(mesh.trS, 0.125), "incorrect areas"
+        assert (mesh.nodeSets['top'] == np.arange(10, 15)).all(), "incorrect border sets"
+        
+        mesh.computeNeighbours()
+        assert (mesh.neighbours != mesh.NEIGHNONE).sum() == 2*(3*2 + 4*1), "incorrect neighbours"
+        
+    def test_plateWithHole(self):
+        quarter = plateWithHoleMesh(9.0, 3.0, 0.5, nt=16, nr=8)
+        plate = plateWithHoleMesh(9.0, 3.0, 0.5, nt=16, nr=8, quarter=False)
+        
+        assert (quarter.trS > 0).all(), "incorrect cells orientation"
+        assert np.isclose(quarter.S.sum(), 27.0 - np.pi*0.25/4, rtol=1e-3), "incorrect area"
+        assert np.isclose(plate.S.sum(), 4*quarter.S.sum()), "incorrect full plate"
+        assert plate.N == 4*quarter.N - 4*(8 + 1), "symmetry nodes are not merged"
+        
+        for name, edges in plate.edgeSets.items():
+            assert len(plate.getBorderEdges(name)) == len(edges), f"incorrect border set '{name}'"
+        assert np.allclose(np.hypot(*plate.nodes[plate.nodeSets['hole']].T), 0.5), \
+               "incorrect hole nodes"
+        
+    def test_subdivide(self):
+        coarse = plateWithHoleMesh(nt=8, nr=4)
+        fine, P = subdivide(coarse, prolongation=True)
+        
+        assert fine.M == 4*coarse.M and (fine.trS > 0).all(), "incorrect subdivision"
+        assert np.isclose(fine.S.sum(), coarse.S.sum()), "area is not preserved"
+        assert np.allclose(P@(coarse.nodes@[1.0, -2.0]), fine.nodes@[1.0, -2.0]), \
+               "prolongation does not preserve linear functions"
+        assert len(fine.getBorderEdges('hole')) == 2*len(coarse.edgeSets['hole']), \
+               "incorrect edge sets"
+        
+        # Решение на измельченной сетке должно быть близко к решению на исходной:
+        D = fm.getD(2e11, 0.3)
+        def solve(mesh):
+            F = fm.getF(mesh)
+            fm.setFNeiman(mesh, F, 1e6, 'right')
+            constraints = fm.Constraints(mesh).fix(0, 'left').fix(1, 'bottom')
+            K, F = constraints.reduce(fm.getK(mesh, D, sparse=True), F)
+            return constraints.expand(fm.solve(K, F))
+        
+        assert np.allclose(solve(fine)[:2*coarse.N], solve(coarse), rtol=0.0, 
+                           atol=0.05*np.abs(solve(coarse)).max()), "refined solution differs"
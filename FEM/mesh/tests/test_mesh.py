@@ -1,6 +1,15 @@
+import os
+
+import numpy as np
+
 from math import isclose
 
-from FEM.mesh import MeshClass, meshFrom
+import FEM as fm
+
+from FEM.mesh import MeshClass, meshFrom, loadMesh
+from FEM.mesh.binary import readArrays, getFileKey
+from FEM.mesh.assembly import assembleMatrix
+from FEM.mesh.renumbering import getBandwidth, getCurveOrder
 
 
 class TestMeshClass:
@@ -20,4 +29,190 @@ class TestMeshClass:
         mesh.computeNeighbours()
         assert isclose(mesh.neighbours[2][1], 1), "incorrect neighbours"
         
-        mesh.computeMatrixS()
\ No newline at end of file
+        mesh.computeNodesToCells()
+        for node in range(mesh.N):
+            cells = mesh.nodesToCells[mesh.nodesToCellsPtr[node]:mesh.nodesToCellsPtr[node + 1]]
+            assert (cells == np.where((mesh.cells == node).any(axis=-1))[0]).all(), \
+                   "incorrect node to cells adjacency"
+        
+        mesh.computeNodesToNodes()
+        assert (mesh.nodesToNodes[mesh.nodesToNodesPtr[2]:mesh.nodesToNodesPtr[3]] == [1, 3, 5]).all(), \
+               "incorrect node to nodes adjacency"
+        
+        mesh.computeMatrixS()
+        
+    def test_assemblyPlan(self):
+        mesh = meshFrom(name='doc/meshes/test.k')
+        mesh.computeAssemblyPlan()
+        plan = mesh.assemblyPlan
+        
+        local = np.random.default_rng(0).random(size=(mesh.M, 4, 4))
+        A = plan.assemble(local)
+        B = assembleMatrix(mesh.cells, mesh.N, local, sparse=True)
+        
+        assert (A.indptr == B.indptr).all() and (A.indices == B.indices).all(), \
+               "incorrect sparsity pattern"
+        assert np.allclose(A.data, B.data), "incorrect assembled values"
+        assert np.allclose(A.data[plan.transpose], A.T.tocsr().data), "incorrect transpose"
+        
+        K = plan.assembleBlocks(A.data, 2*A.data, 3*A.data, 4*A.data)
+        assert np.allclose(K[1::2, 0::2].toarray(), 3*A.toarray()), "incorrect block assembly"
+        
+        sortedK = K.copy()
+        sortedK.has_sorted_indices = False
+        sortedK.sort_indices()
+        assert (sortedK.indices == K.indices).all(), "block assembly indices are not sorted"
+        
+    def test_parallelMatrixS(self):
+        mesh = meshFrom(name='doc/meshes/test.k')
+        
+        mesh.computeMatrixS(sparse=True)
+        matrixS = mesh.matrixS
+        mesh.matrixS = None
+        mesh.computeMatrixS(sparse=True, workers=4)
+        
+        assert np.allclose(mesh.matrixS.toarray(), matrixS.toarray()), \
+               "parallel assembly differs from serial one"
+        
+    def test_neighbours(self):
+        mesh = meshFrom(name='doc/meshes/kirsch/s1.k')
+        mesh.computeNeighbours()
+        
+        cells, edges = np.where(mesh.neighbours != mesh.NEIGHNONE)
+        neighbours = mesh.neighbours[cells, edges]
+        
+        # Общее ребро проходится соседями в противоположных направлениях:
+        back = (mesh.neighbours[neighbours] == cells[:, np.newaxis]).argmax(axis=-1)
+        assert (mesh.cells[cells, edges] == mesh.cells[neighbours, (back + 1) % 4]).all(), \
+               "neighbours do not share edges"
+        
+        edges = np.sort(np.stack((mesh.cells, np.roll(mesh.cells, -1, axis=1)), axis=-1).reshape(-1, 2))
+        _, counts = np.unique(edges, axis=0, return_counts=True)
+        assert (mesh.neighbours == mesh.NEIGHNONE).sum() == (counts == 1).sum(), \
+               "incorrect number of border edges"
+        
+    def test_caches(self):
+        mesh = meshFrom(name='doc/meshes/test.k', dtype=np.float32)
+        assert set(mesh.memoryReport()) == {'nodes', 'cells', 'S', 'trS', 'nodeSets', 'edgeSets'}, \
+               "derived data is computed eagerly"
+        
+        assert mesh.coords.dtype == np.float32 and mesh.B.dtype == np.float32, \
+               "incorrect storage type"
+        assert len(mesh.borderNodes) > 0 and 'borderEdges' in mesh.memoryReport(), \
+               "derived data is not computed lazily"
+        assert mesh.memoryReport()['coords'] == mesh.M*4*2*4, "incorrect memory report"
+        
+        mesh.dropCaches('borderNodes')
+        assert 'borderEdges' not in mesh.memoryReport() and 'coords' in mesh.memoryReport(), \
+               "incorrect cache dropping"
+        mesh.dropCaches()
+        assert 'coords' not in mesh.memoryReport(), "caches are not dropped"
+        
+    def test_matrixSForms(self):
+        mesh = meshFrom(name='doc/meshes/test.k')
+        assert isinstance(mesh.matrixS, np.ndarray), "matrixS is not dense by default"
+        
+        sparse = mesh.sparseMatrixS
+        mesh.computeMatrixS(sparse=True)
+        assert mesh.matrixS is sparse, "sparse matrixS is assembled again"
+        mesh.computeMatrixS()
+        assert mesh.sparseMatrixS is sparse and np.allclose(mesh.matrixS, sparse.toarray()), \
+               "dense matrixS is not derived from sparse one"
+        
+    def test_sharedCaches(self):
+        mesh = meshFrom(name='doc/meshes/test.k')
+        fm.getK(mesh, fm.getD(2e7, 0.25), sparse=True)
+        report = mesh.memoryReport()
+        factors = next(iter(mesh.stiffnessFactors.values()))
+        
+        assert report['stiffnessFactors'] == sum(M.data.nbytes + M.indices.nbytes + M.indptr.nbytes 
+                                                 for M in (factors.XX, factors.YY, factors.XY)), \
+               "assembly plan is counted twice"
+               
+        mesh.dropCaches('assemblyPlan')
+        assert not mesh.stiffnessFactors, "stiffness factors keep dropped assembly plan"
+        
+    def test_binary(self, tmp_path):
+        name = str(tmp_path/'sets_test.k')
+        with open('doc/meshes/sets_test.k') as source, open(name, 'w') as target:
+            target.write(source.read())
+        
+        mesh = meshFrom(name=name, cache=True)
+        cached = meshFrom(name=name, cache=True)
+        
+        assert isinstance(loadMesh(name + '.kcache').nodes.base, np.memmap), "mesh is not memory-mapped"
+        assert 'neighbours' in cached.memoryReport(), "derived data is not cached"
+        for field in ('nodes', 'cells', 'S', 'trS', 'neighbours', 'centers'):
+            assert (getattr(cached, field) == getattr(mesh, field)).all(), f"incorrect cached {field}"
+        assert (cached.nodeSets['bottom'] == [1, 6]).all() and (cached.edgeSets['top'] == [[4, 5]]).all(), \
+               "incorrect cached sets"
+        
+        os.utime(name, ns=(0, 10**18))
+        assert 'bottom' in meshFrom(name=name, cache=True).nodeSets, "incorrect mesh for touched file"
+        assert readArrays(name + '.kcache')[1]['source'] == getFileKey(name), "cache key is not refreshed"
+            
+        with open(name) as file:
+            text = file.read()
+        with open(name, 'w') as file:
+            file.write(text.replace('*SET_NODE_LIST_TITLE', '*COMMENT'))
+        assert 'bottom' not in meshFrom(name=name, cache=True).nodeSets, "outdated cache is used"
+        
+    def test_renumbering(self):
+        mesh = meshFrom(name='doc/meshes/kirsch/s1.k')
+        mesh.computeNeighbours()
+        renumbered = mesh.renumbered()
+        
+        assert getBandwidth(renumbered.assemblyPlan.indptr, renumbered.assemblyPlan.indices) < \
+               getBandwidth(mesh.assemblyPlan.indptr, mesh.assemblyPlan.indices)/4, \
+               "bandwidth is not reduced"
+        assert np.allclose(renumbered.nodes, mesh.nodes[renumbered.nodePerm]) and \
+               (renumbered.cells == np.argsort(renumbered.nodePerm)[mesh.cells[renumbered.cellPerm]]).all(), \
+               "inconsistent permutations"
+        assert np.allclose(renumbered.toOriginalNodes(np.repeat(renumbered.nodes, 2, axis=0)), 
+                           np.repeat(mesh.nodes, 2, axis=0)), "incorrect mapping to original nodes"
+        assert np.allclose(renumbered.toOriginalCells(renumbered.S), mesh.S), \
+               "incorrect mapping to original cells"
+        
+        neighbours = renumbered.neighbours
+        renumbered.dropCaches('neighbours')
+        assert (renumbered.neighbours == neighbours).all(), "incorrect permuted neighbours"
+        
+        grid = np.stack(np.meshgrid(np.arange(16.0), np.arange(16.0)), axis=-1).reshape(-1, 2)
+        assert np.abs(np.diff(grid[getCurveOrder(grid, bits=4)], axis=0)).sum(axis=-1).max() == 1.0, \
+               "Hilbert curve is not continuous"
+        
+    def test_partition(self):
+        mesh = meshFrom(name='doc/meshes/kirsch/s1.k')
+        
+        for method in ('inertial', 'coordinate'):
+            partition = mesh.partition(3, method)
+            sizes = [len(cells) for cells in partition.cells]
+            
+            assert partition.parts == 3 and max(sizes) - min(sizes) <= 1, "unbalanced partition"
+            assert (np.sort(np.concatenate(partition.cells)) == np.arange(mesh.M)).all(), \
+                   "cells are not covered exactly once"
+            
+            counts = np.bincount(np.concatenate(partition.nodes), minlength=mesh.N)
+            assert counts.min() == 1, "nodes are not covered"
+            assert (partition.interface == np.where(counts > 1)[0]).all() and \
+                   0 < len(partition.interface) < mesh.N/4, "incorrect interface nodes"
+            
+            extended = partition.getNodes(mesh, 0, overlap=1)
+            assert np.isin(partition.nodes[0], extended).all() and \
+                   len(extended) > len(partition.nodes[0]), "incorrect overlap"
+        
+    def test_border(self):
+        mesh = meshFrom(name='doc/meshes/sets_test.k')
+        mesh.computeBorder()
+        
+        assert len(mesh.borderEdges) == 6, "incorrect number of border edges"
+        assert (mesh.borderNodes == [0, 1, 3, 4, 5, 6]).all(), "incorrect border nodes"
+        assert np.isclose(mesh.borderLengths.sum(), 5.5 + np.sqrt(1.25)), "incorrect border length"
+        
+        top = mesh.getBorderEdges('top')
+        assert (mesh.borderEdges[top] == [[5, 4]]).all(), "incorrect edge set lookup"
+        assert np.allclose(mesh.borderNormals[top], [[0.0, 1.0]]), "incorrect border normal"
+        assert (mesh.borderEdges[mesh.getBorderEdges('bottom')] == [[1, 6]]).all(), \
+               "incorrect node set edges lookup"
+        assert len(mesh.getBorderEdges(lambda a: np.isclose(a[..., 1], 0.0))) == 2, \
+               "incorrect border function edges lookup"
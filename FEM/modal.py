@@ -0,0 +1,258 @@
+__all__ = ["modes", "ModalSolver"]
+
+
+import numpy as np
+import scipy.sparse.linalg as sp
+
+from .FEM import getK, getM, getCellsStrain
+
+
+def modes(mesh, D, rho, t, k=6, sigma=None, constraints=None, quadrature=None):
+    """
+    Модальный анализ: находит k собственных частот и форм колебаний сетки mesh,
+    ближайших к сдвигу sigma, решая обобщенную задачу на собственные значения
+        K U = w^2 M U
+    с разреженными матрицами K, M методом Ланцоша в режиме shift-invert
+
+
+    Параметры
+    -------------
+
+    mesh : MeshClass
+        Сетка
+
+    D : np.array(shape=(3, 3))
+        Матрица закона Гука (см. getD)
+
+    rho, t : float
+        Плотность материала и толщина пластины
+
+    k : int, optional
+        Количество искомых собственных частот
+
+    sigma : float, optional
+        Сдвиг для квадрата круговой частоты w^2
+        Если None (default), то используется малый отрицательный сдвиг,
+        так что находятся k наименьших частот (в том числе нулевые частоты
+        движений как твердого тела, если они не запрещены constraints)
+
+    constraints : Constraints, optional
+        Заданные перемещения (значения игнорируются, так как задача однородна)
+        Соответствующие степени свободы исключаются из K и M
+
+    quadrature : optional
+        Квадратурная формула для матрицы K (см. getK)
+
+
+    Возвращает пару (frequencies, shapes):
+
+    frequencies : np.array(shape=(k, ), dtype=np.double)
+        Собственные частоты f = w/(2pi) в порядке возрастания
+    shapes : np.array(shape=(2N, k), dtype=np.double)
+        Формы колебаний, нормированные так, что shapes.T@M@shapes = I
+        (для заданных степеней свободы равны нулю)
+    """
+
+    K = getK(mesh, D, sparse=True, quadrature=quadrature)*t
+    M = getM(mesh, rho, t, sparse=True)
+
+    if constraints is not None:
+        K = constraints.reduce(K)
+        M = constraints.reduce(M)
+
+    if sigma is None:
+        sigma = -1e-6*K.diagonal().mean()/M.diagonal().mean()
+
+    w2, vectors = sp.eigsh(K.tocsc(), k, M.tocsc(), sigma=sigma, which='LM')
+
+    order = np.argsort(w2)
+    w2, vectors = w2[order], vectors[:, order]
+
+    if constraints is None:
+        shapes = vectors
+    else:
+        shapes = np.zeros(shape=(2*mesh.N, k), dtype=np.double)
+        shapes[constraints.free] = vectors
+
+    return np.sqrt(np.maximum(w2, 0.0))/(2*np.pi), shapes
+
+
+class ModalSolver:
+    """
+    Класс для расчета динамического отклика методом разложения по формам колебаний
+    
+    Перемещения ищутся в виде U(t) = shapes@q(t) по k низшим формам колебаний,
+    так что система распадается на k независимых уравнений
+        q'' + 2 damping w q' + w^2 q = shapes.T@F(t),
+    которые интегрируются точно для кусочно-линейной по времени нагрузки
+    одновременно для всех форм
+    
+    
+    Атрибуты
+    ------------
+    
+    mesh : MeshClass
+        Сетка
+    frequencies : np.array(shape=(k, ), dtype=np.double)
+        Собственные частоты (см. modes)
+    shapes : np.array(shape=(2N, k), dtype=np.double)
+        Нормированные формы колебаний
+    damping : np.array(shape=(k, ), dtype=np.double)
+        Коэффициенты модального демпфирования (доли от критического)
+    """
+    
+    def __init__(self, mesh, D, rho, t, k=10, constraints=None, damping=0.0, 
+                 sigma=None, quadrature=None):
+        """
+        Параметры
+        -------------
+        
+        mesh, D, rho, t, k, constraints, sigma, quadrature
+            см. modes
+            
+        damping : float or array-like, optional
+            Коэффициенты модального демпфирования из [0, 1) 
+            для всех форм или для каждой формы
+        """
+        
+        self.mesh = mesh
+        self.frequencies, self.shapes = modes(mesh, D, rho, t, k, sigma, 
+                                              constraints, quadrature)
+        self.damping = np.broadcast_to(np.asarray(damping, dtype=np.double), (k, )).copy()
+        
+        self._M = getM(mesh, rho, t, sparse=True)
+        self._modalStrains = None
+        
+        
+    def project(self, F):
+        """
+        Проецирует нагрузки F : shape=(2N, ) или shape=(2N, m) на формы колебаний
+        """
+        
+        return self.shapes.T@F
+    
+    def _coefficients(self, dt):
+        """
+        Коэффициенты точной схемы для кусочно-линейной нагрузки
+        (u, v)(n + 1) = [[A, B], [A', B']] (u, v)(n) + [[C, D], [C', D']] (p(n), p(n + 1))
+        для всех форм
+        """
+        
+        w, z = 2*np.pi*self.frequencies, self.damping
+        isRigid = w*dt < 1e-6
+        w = np.where(isRigid, 1.0, w)
+        
+        sq = np.sqrt(1 - z*z)
+        wd = w*sq
+        e = np.exp(-z*w*dt)
+        sin, cos = np.sin(wd*dt), np.cos(wd*dt)
+        k = w*w
+        
+        A  = e*(z/sq*sin + cos)
+        B  = e*sin/wd
+        C  = (2*z/(w*dt) + e*(((1 - 2*z*z)/(wd*dt) - z/sq)*sin - (1 + 2*z/(w*dt))*cos))/k
+        D  = (1 - 2*z/(w*dt) + e*((2*z*z - 1)/(wd*dt)*sin + 2*z/(w*dt)*cos))/k
+        A_ = -e*w/sq*sin
+        B_ = e*(cos - z/sq*sin)
+        C_ = (-1/dt + e*((w/sq + z/(dt*sq))*sin + cos/dt))/k
+        D_ = (1 - e*(z/sq*sin + cos))/(k*dt)
+        
+        # Формы движения как твердого тела (w = 0):
+        rigid = np.array([1.0, dt, dt*dt/3, dt*dt/6, 0.0, 1.0, dt/2, dt/2])
+        result = np.array([A, B, C, D, A_, B_, C_, D_])
+        result[:, isRigid] = rigid[:, np.newaxis]
+        return result
+        
+    def integrate(self, dt, nsteps, F=None, g=None, U0=None, V0=None, every=1):
+        """
+        Интегрирует уравнения для модальных координат q(t)
+        
+        
+        Параметры
+        -------------
+        
+        dt : float
+            Шаг по времени (нагрузка считается линейной на каждом шаге)
+            
+        nsteps : int
+            Количество шагов
+            
+        F : np.array(shape=(2N, )) или np.array(shape=(2N, m)), optional
+            Пространственные распределения нагрузок (например, из setFNeiman)
+            Проецируются на формы колебаний один раз
+            
+        g : callable or np.array, optional
+            Зависимость нагрузок от времени: F(t) = F@g(t),
+            где g(t) - число или np.array(shape=(m, ))
+            Может быть задана массивом значений shape=(nsteps + 1, ...) на шагах
+            По умолчанию нагрузка постоянна (g = 1)
+            
+        U0, V0 : np.array(shape=(2N, )), optional
+            Начальные перемещения и скорости
+            
+        every : int, optional
+            Модальные координаты сохраняются на каждом every-ом шаге
+            
+        
+        Возвращает тройку (times, q, dq):
+            times : np.array(shape=(n, ))
+            q, dq : np.array(shape=(n, k)) - модальные координаты и их скорости
+        """
+        
+        k = self.frequencies.size
+        times = np.arange(nsteps + 1)*dt
+        
+        if F is None:
+            p = np.zeros(shape=(nsteps + 1, k), dtype=np.double)
+        else:
+            P = self.project(F)
+            if g is None:
+                gt = np.ones(shape=(nsteps + 1, ) + P.shape[1:])
+            elif callable(g):
+                gt = np.array([g(time) for time in times], dtype=np.double)
+            else:
+                gt = np.asarray(g, dtype=np.double)
+            p = gt.reshape(nsteps + 1, -1)@P.reshape(k, -1).T
+        
+        q  = np.zeros(shape=(k, )) if U0 is None else self.shapes.T@(self._M@U0)
+        dq = np.zeros(shape=(k, )) if V0 is None else self.shapes.T@(self._M@V0)
+        
+        A, B, C, D, A_, B_, C_, D_ = self._coefficients(dt)
+        
+        Q, dQ = [q], [dq]
+        for n in range(nsteps):
+            q, dq = A *q + B *dq + C *p[n] + D *p[n + 1], \
+                    A_*q + B_*dq + C_*p[n] + D_*p[n + 1]
+            if (n + 1) % every == 0:
+                Q.append(q)
+                dQ.append(dq)
+                
+        return times[::every], np.array(Q), np.array(dQ)
+    
+    def displacements(self, q, nodes=None):
+        """
+        Восстанавливает перемещения по модальным координатам q : shape=(n, k)
+        
+        Если заданы индексы узлов nodes, то перемещения вычисляются
+        только в них: np.array(shape=(n, len(nodes), 2)),
+        иначе во всех узлах: np.array(shape=(n, 2N))
+        """
+        
+        if nodes is None:
+            return q@self.shapes.T
+        
+        shapes = self.shapes.reshape(-1, 2, self.frequencies.size)[nodes]
+        return np.einsum('ndk,tk->tnd', shapes, q)
+    
+    def strains(self, q, cells=None):
+        """
+        Восстанавливает деформации на элементах по модальным координатам 
+        q : shape=(n, k), возвращает np.array(shape=(n, M, 3)) 
+        или np.array(shape=(n, len(cells), 3)), если заданы индексы элементов cells
+        """
+        
+        if self._modalStrains is None:
+            self._modalStrains = getCellsStrain(self.mesh, self.shapes)
+            
+        strains = self._modalStrains if cells is None else self._modalStrains[cells]
+        return np.einsum('mck,tk->tmc', strains, q)
@@ -0,0 +1,186 @@
+__all__ = ["getHierarchy", "Multigrid"]
+
+
+import numpy as np
+import scipy.sparse.linalg as sp
+
+from scipy.sparse import kron, identity, tril, triu, csc_matrix, csr_matrix
+
+from .mesh.generator import subdivide
+from .solvers import factorize, SolveInfo
+
+
+def getHierarchy(mesh, levels):
+    """
+    Строит иерархию вложенных сеток, равномерно измельчая сетку mesh
+    (например, считанную meshFrom) levels раз (см. FEM.mesh.generator.subdivide)
+
+    Возвращает пару (meshes, prolongations):
+        meshes - список из levels + 1 сеток от исходной до самой мелкой
+        prolongations - список из levels матриц интерполяции узловых значений
+            с сетки meshes[l] на сетку meshes[l + 1]
+    """
+
+    meshes, prolongations = [mesh], []
+    for _ in range(levels):
+        fine, P = subdivide(meshes[-1], prolongation=True)
+        meshes.append(fine)
+        prolongations.append(P)
+
+    return meshes, prolongations
+
+
+class Multigrid:
+    """
+    Класс, реализующий геометрический многосеточный метод (V-цикл)
+    для системы K U = F на самой мелкой сетке иерархии вложенных сеток
+
+    Матрицы грубых сеток строятся по Галеркину: K_c = P.T K P, где P - матрица
+    интерполяции перемещений, а ограничение невязки на грубую сетку - P.T,
+    так что V-цикл с симметричным сглаживанием является симметричным
+    положительно определенным предобуславливателем для FEM.pcg
+
+
+    Атрибуты
+    ------------
+
+    matrices : list of scipy.sparse.csr_matrix
+        Матрицы систем на уровнях от самого грубого до самого мелкого
+    prolongations : list of scipy.sparse.csr_matrix
+        Матрицы интерполяции перемещений с уровня l на уровень l + 1
+        (для свободных степеней свободы)
+    """
+
+    def __init__(self, K, prolongations, constraints=None, smoother='jacobi',
+                 omega=0.6, sweeps=2):
+        """
+        Параметры
+        -------------
+
+        K : scipy.sparse матрица
+            Матрица системы на самой мелкой сетке (например, getK(mesh, D, sparse=True)),
+            из которой исключены заданные степени свободы constraints
+
+        prolongations : list of scipy.sparse матриц
+            Матрицы интерполяции узловых значений между уровнями (см. getHierarchy)
+
+        constraints : Constraints, optional
+            Заданные перемещения на самой мелкой сетке (см. Constraints.reduce)
+            Узлы грубых сеток сохраняют номера на мелких сетках, поэтому
+            их заданные степени свободы определяются по самой мелкой сетке
+
+        smoother : {'jacobi', 'gauss-seidel'}, optional
+            Сглаживание: взвешенный метод Якоби с весом omega
+            или метод Гаусса-Зейделя (прямой до и обратный после
+            перехода на грубую сетку)
+
+        sweeps : int, optional
+            Количество итераций сглаживания до и после перехода на грубую сетку
+        """
+
+        if smoother not in ('jacobi', 'gauss-seidel'):
+            raise ValueError(f"Unknown smoother '{smoother}'; "
+                             f"Expected 'jacobi' or 'gauss-seidel'")
+
+        self.smoother = smoother
+        self.omega = omega
+        self.sweeps = sweeps
+
+        eye = identity(2, format='csr')
+        self.prolongations = []
+
+        fineN = 2*prolongations[-1].shape[0]
+        isFree = np.ones(shape=(fineN, ), dtype=bool) if constraints is None \
+                 else ~constraints.isFixed
+        for P in reversed(prolongations):
+            P = kron(P, eye, format='csr')
+            coarseFree = isFree[:P.shape[1]]
+            self.prolongations.append(P[isFree][:, coarseFree].tocsr())
+            isFree = coarseFree
+        self.prolongations.reverse()
+
+        self.matrices = [csr_matrix(K)]
+        for P in reversed(self.prolongations):
+            self.matrices.append((P.T@self.matrices[-1]@P).tocsr())
+        self.matrices.reverse()
+
+        self._coarse = factorize(csc_matrix(self.matrices[0]), cache=False)
+        self._invDiag = [1/A.diagonal() for A in self.matrices]
+        if smoother == 'gauss-seidel':
+            # Треугольные решатели без заполнения:
+            options = dict(permc_spec='NATURAL', diag_pivot_thresh=0.0,
+                           options=dict(SymmetricMode=True))
+            self._lower = [sp.splu(csc_matrix(tril(A)), **options) for A in self.matrices]
+            self._upper = [sp.splu(csc_matrix(triu(A)), **options) for A in self.matrices]
+
+
+    @property
+    def shape(self):
+        return self.matrices[-1].shape
+
+    def _smooth(self, level, x, b, forward):
+        A = self.matrices[level]
+        for _ in range(self.sweeps):
+            r = b - A@x
+            if self.smoother == 'jacobi':
+                x += self.omega*self._invDiag[level]*r
+            elif forward:
+                x += self._lower[level].solve(r)
+            else:
+                x += self._upper[level].solve(r)
+        return x
+
+    def _cycle(self, level, b):
+        if level == 0:
+            return self._coarse.solve(b)
+
+        A, P = self.matrices[level], self.prolongations[level - 1]
+        x = self._smooth(level, np.zeros_like(b), b, forward=True)
+        x += P@self._cycle(level - 1, P.T@(b - A@x))
+        return self._smooth(level, x, b, forward=False)
+
+    def vcycle(self, r):
+        """
+        Применяет один V-цикл с нулевым начальным приближением к невязке r,
+        возвращая приближение к решению K z = r
+        """
+
+        return self._cycle(len(self.matrices) - 1, np.asarray(r, dtype=np.double))
+
+    matvec = vcycle
+
+    def solve(self, F, x0=None, tol=1e-8, atol=0.0, maxiter=100, callback=None):
+        """
+        Решает систему K U = F итерациями V-цикла
+        (параметры и результат аналогичны FEM.pcg)
+        """
+
+        F = np.asarray(F, dtype=np.double)
+        K = self.matrices[-1]
+
+        if F.ndim == 2:
+            U = np.empty_like(F)
+            infos = []
+            for j in range(F.shape[1]):
+                U[:, j], info = self.solve(F[:, j], None if x0 is None else x0[:, j],
+                                           tol, atol, maxiter, callback)
+                infos.append(info)
+            return U, infos
+
+        U = np.zeros_like(F) if x0 is None else np.array(x0, dtype=np.double)
+        r = F - K@U
+
+        bound = max(tol*np.linalg.norm(F), atol)
+        residuals = [np.linalg.norm(r)]
+
+        iterations = 0
+        while residuals[-1] > bound and iterations < maxiter:
+            U += self.vcycle(r)
+            r = F - K@U
+
+            iterations += 1
+            residuals.append(np.linalg.norm(r))
+            if callback is not None:
+                callback(U)
+
+        return U, SolveInfo(residuals[-1] <= bound, iterations, residuals)
@@ -0,0 +1,51 @@
+__all__ = ["QUADRATURES", "getQuadrature"]
+
+
+import numpy as np
+
+
+"""
+Квадратурные формулы для интегрирования по идеальному 
+четырехугольному элементу [-1, 1] x [-1, 1]
+
+Каждая формула задается парой (points, weights):
+    points : np.array(shape=(Q, 2), dtype=np.double) - опорные точки (t, s)
+    weights : np.array(shape=(Q, ), dtype=np.double) - веса
+"""
+
+QUADRATURES = {
+    # Формула по вершинам элемента (используется в getK по умолчанию):
+    'corner' : (np.array([[-1.0, -1.0], 
+                          [ 1.0, -1.0], 
+                          [ 1.0,  1.0], 
+                          [-1.0,  1.0]], dtype=np.double),
+                np.array([1.0, 1.0, 1.0, 1.0], dtype=np.double)),
+    
+    # Одноточечная формула Гаусса:
+    'gauss1' : (np.array([[0.0, 0.0]], dtype=np.double),
+                np.array([4.0], dtype=np.double)),
+    
+    # Формула Гаусса 2x2 с опорными точками в (+-1/sqrt(3), +-1/sqrt(3)):
+    'gauss2' : (np.array([[-1.0, -1.0], 
+                          [ 1.0, -1.0], 
+                          [ 1.0,  1.0], 
+                          [-1.0,  1.0]], dtype=np.double)/np.sqrt(3),
+                np.array([1.0, 1.0, 1.0, 1.0], dtype=np.double)),
+}
+
+
+def getQuadrature(quadrature):
+    """
+    Возвращает пару (points, weights) для квадратурной формулы quadrature,
+    заданной либо именем из QUADRATURES, либо самой парой (points, weights)
+    """
+    
+    if isinstance(quadrature, str):
+        try:
+            return QUADRATURES[quadrature]
+        except KeyError:
+            raise ValueError(f"Unknown quadrature '{quadrature}'; Expected one of {list(QUADRATURES)}")
+    
+    points, weights = quadrature
+    return (np.asarray(points, dtype=np.double).reshape(-1, 2), 
+            np.asarray(weights, dtype=np.double).reshape(-1))
@@ -0,0 +1,131 @@
+__all__ = ["applySPR", "getSPRError"]
+
+
+import numpy as np
+
+
+def applySPR(mesh, values, minPatch=3):
+    """
+    Методом суперсходящегося восстановления по патчам (Зенкевича-Жу)
+    вычисляет значения в узлах сетки mesh на основе значений values : shape=(M, )
+    в центрах элементов или сразу для блока полей values : shape=(M, k)
+    (результат shape=(N, ) или shape=(N, k))
+
+    Для каждого узла по значениям в центрах содержащих его элементов (патча)
+    методом наименьших квадратов строится линейная функция, значение которой
+    в узле и принимается за результат. Все патчи обрабатываются одновременно,
+    глобальная система не решается
+
+    Для узлов, патчи которых содержат меньше minPatch элементов (обычно граничных),
+    значения вычисляются как среднее значений в узле линейных функций патчей
+    соседних узлов, а при их отсутствии - как среднее по площадям значений
+    на элементах патча
+    """
+
+    values = np.asarray(values, dtype=np.double)
+    block = values.reshape(mesh.M, -1)
+
+    coefs, isFitted = _fitPatches(mesh, block, minPatch)
+
+    result = coefs[:, 0].copy()
+    if not isFitted.all():
+        result[~isFitted] = _extrapolate(mesh, block, coefs, isFitted)
+
+    return result.reshape((mesh.N, ) + values.shape[1:])
+
+
+def getSPRError(mesh, values, nodal=None):
+    """
+    Возвращает оценку ошибки Зенкевича-Жу для каждого элемента
+    np.array(shape=(M, ), dtype=np.double):
+        e^2 = интеграл по элементу |nodal - values|^2,
+    где nodal - восстановленные по values значения в узлах (см. applySPR),
+    интерполированные на элемент (интеграл вычисляется по узлам элемента)
+
+    Для блока полей values : shape=(M, k) ошибки суммируются по полям
+    """
+
+    values = np.asarray(values, dtype=np.double)
+    block = values.reshape(mesh.M, -1)
+
+    if nodal is None:
+        nodal = applySPR(mesh, block)
+    nodal = np.asarray(nodal, dtype=np.double).reshape(mesh.N, -1)
+
+    diff = nodal[mesh.cells] - block[:, np.newaxis, :]
+    return np.sqrt(mesh.S*(diff*diff).sum(axis=(1, 2))/4)
+
+
+def _fitPatches(mesh, block, minPatch):
+    """
+    Строит линейные функции a0 + a1 x + a2 y (в локальных координатах патча,
+    отсчитываемых от узла и нормированных на размер патча) для всех патчей
+
+    Возвращает пару (coefs, isFitted):
+        coefs : np.array(shape=(N, 3, k)) - коэффициенты функций
+        isFitted : np.array(shape=(N, ), dtype=bool) - построена ли функция
+    """
+
+    mesh.computeCenters()
+    mesh.computeNodesToCells()
+
+    counts = np.diff(mesh.nodesToCellsPtr)
+    nodes = np.repeat(np.arange(mesh.N), counts)
+    cells = mesh.nodesToCells
+
+    # Центрированные и нормированные координаты центров элементов патчей:
+    d = mesh.centers[cells] - mesh.nodes[nodes]
+    h = np.zeros(shape=(mesh.N, ), dtype=np.double)
+    np.maximum.at(h, nodes, np.abs(d).max(axis=-1))
+    d /= np.where(h > 0, h, 1.0)[nodes, np.newaxis]
+
+    P = np.column_stack((np.ones_like(d[:, 0]), d))
+
+    A = np.zeros(shape=(mesh.N, 3, 3), dtype=np.double)
+    b = np.zeros(shape=(mesh.N, 3, block.shape[1]), dtype=np.double)
+    np.add.at(A, nodes, P[:, :, np.newaxis]*P[:, np.newaxis, :])
+    np.add.at(b, nodes, P[:, :, np.newaxis]*block[cells, np.newaxis, :])
+
+    # Вырожденные патчи (например, с центрами на одной прямой) исключаются:
+    isFitted = (counts >= minPatch) & (np.abs(np.linalg.det(A)) > 1e-8*counts**3)
+
+    coefs = np.zeros_like(b)
+    coefs[isFitted] = np.linalg.solve(A[isFitted], b[isFitted])
+
+    # Переход к коэффициентам в координатах, отсчитываемых от узла без нормировки:
+    coefs[:, 1:] /= np.where(h > 0, h, 1.0)[:, np.newaxis, np.newaxis]
+    return coefs, isFitted
+
+
+def _extrapolate(mesh, block, coefs, isFitted):
+    """
+    Вычисляет значения в узлах с невосстановленными патчами
+    по линейным функциям соседних (по элементам) узлов с восстановленными патчами
+    """
+
+    k = block.shape[1]
+
+    # Пары узлов (откуда, куда) внутри каждого элемента:
+    pairs = np.stack(np.broadcast_arrays(mesh.cells[:, :, np.newaxis],
+                                         mesh.cells[:, np.newaxis, :]), axis=-1).reshape(-1, 2)
+    pairs = np.unique(pairs[isFitted[pairs[:, 0]] & ~isFitted[pairs[:, 1]]], axis=0)
+    source, target = pairs.T
+
+    d = mesh.nodes[target] - mesh.nodes[source]
+    estimates = coefs[source, 0] + np.einsum('pd,pdk->pk', d, coefs[source, 1:])
+
+    sums = np.zeros(shape=(mesh.N, k), dtype=np.double)
+    np.add.at(sums, target, estimates)
+    counts = np.bincount(target, minlength=mesh.N)
+
+    # Среднее по площадям для узлов без соседей с восстановленными патчами:
+    weights = np.repeat(mesh.S, 4)
+    means = np.bincount(mesh.cells.ravel(), weights=weights, minlength=mesh.N)
+    means = np.stack([
+        np.bincount(mesh.cells.ravel(), weights=weights*np.repeat(block[:, j], 4),
+                    minlength=mesh.N) for j in range(k)
+    ], axis=-1)/np.where(means > 0, means, 1.0)[:, np.newaxis]
+
+    result = np.where(counts[:, np.newaxis] > 0,
+                      sums/np.maximum(counts, 1)[:, np.newaxis], means)
+    return result[~isFitted]
@@ -0,0 +1,321 @@
+__all__ = ["Factorization", "factorize", "solve", "clearFactorizations",
+           "getPreconditioner", "SolveInfo", "pcg"]
+
+
+import weakref
+import zlib
+
+import numpy as np
+import scipy.linalg as la
+import scipy.sparse.linalg as sp
+
+from scipy.sparse import issparse, csc_matrix
+
+try:
+    from sksparse.cholmod import cholesky as _cholmod
+except ImportError:
+    _cholmod = None
+
+
+class Factorization:
+    """
+    Класс для хранения разложения матрицы системы K U = F,
+    позволяющего многократно решать систему для разных правых частей
+
+
+    Атрибуты
+    ------------
+
+    method : str
+        Используемый метод разложения:
+            'cholmod' - разреженное разложение Холецкого (требует scikit-sparse)
+            'lu'      - разреженное LU-разложение scipy.sparse.linalg.splu
+            'cholesky', 'dense_lu' - разложения плотных матриц scipy.linalg
+    shape : tuple
+        Размеры матрицы системы
+    """
+
+    def __init__(self, K, method='auto'):
+        """
+        Параметры
+        -------------
+
+        K : np.array или scipy.sparse матрица
+            Матрица системы
+
+        method : {'auto', 'cholmod', 'lu', 'cholesky', 'dense_lu'}, optional
+            Метод разложения
+            Если 'auto' (default), то для разреженных матриц используется 'cholmod',
+            если доступен scikit-sparse, иначе 'lu',
+            а для плотных - 'cholesky' с переходом к 'dense_lu',
+            если матрица не положительно определена
+        """
+
+        self.shape = K.shape
+
+        if method == 'auto':
+            if issparse(K):
+                method = 'lu' if _cholmod is None else 'cholmod'
+            else:
+                method = 'cholesky'
+
+        if method == 'cholmod':
+            if _cholmod is None:
+                raise ImportError("Method 'cholmod' requires scikit-sparse package")
+            self._factor = _cholmod(K.tocsc())
+        elif method == 'lu':
+            self._factor = sp.splu(K.tocsc(), permc_spec='MMD_AT_PLUS_A',
+                                   options=dict(SymmetricMode=True))
+        elif method == 'cholesky':
+            try:
+                self._factor = la.cho_factor(_toDense(K))
+            except la.LinAlgError:
+                method = 'dense_lu'
+                self._factor = la.lu_factor(_toDense(K))
+        elif method == 'dense_lu':
+            self._factor = la.lu_factor(_toDense(K))
+        else:
+            raise ValueError(f"Unknown factorization method '{method}'")
+
+        self.method = method
+
+    def solve(self, F):
+        """
+        Решает систему K U = F для правой части F : shape=(n, )
+        или сразу для блока правых частей F : shape=(n, k)
+        """
+
+        F = np.asarray(F, dtype=np.double)
+
+        if self.method == 'cholmod':
+            return self._factor(F)
+        if self.method == 'lu':
+            return self._factor.solve(F)
+        if self.method == 'cholesky':
+            return la.cho_solve(self._factor, F)
+        return la.lu_solve(self._factor, F)
+
+
+def _toDense(K):
+    return K.toarray() if issparse(K) else np.asarray(K)
+
+
+def _fingerprint(K):
+    """
+    Возвращает ключ, по которому проверяется, что матрица K
+    не изменилась с момента разложения
+    """
+
+    if issparse(K):
+        arrays = [K.data, K.indices, K.indptr] if K.format in ('csr', 'csc') else [K.toarray()]
+        key = (K.format, K.shape, K.nnz)
+    else:
+        arrays = [np.asarray(K)]
+        key = ('dense', K.shape)
+
+    return key + tuple(zlib.crc32(np.ascontiguousarray(a)) for a in arrays)
+
+
+# Кэш разложений: id(K) -> (ключ матрицы, метод, разложение)
+_factorizations = {}
+
+def factorize(K, method='auto', cache=True):
+    """
+    Возвращает разложение Factorization матрицы K
+
+    Если cache = True (default), то разложение сохраняется до удаления K,
+    и повторные вызовы для той же (не измененной) матрицы возвращают его
+    без пересчета
+    """
+
+    if not cache:
+        return Factorization(K, method)
+
+    indx = id(K)
+    fingerprint = _fingerprint(K)
+
+    if indx in _factorizations:
+        cached, cachedMethod, factor = _factorizations[indx]
+        if cached == fingerprint and method in ('auto', cachedMethod):
+            return factor
+    else:
+        weakref.finalize(K, _factorizations.pop, indx, None)
+
+    factor = Factorization(K, method)
+    _factorizations[indx] = (fingerprint, factor.method, factor)
+    return factor
+
+def clearFactorizations():
+    """
+    Очищает кэш разложений
+    """
+
+    _factorizations.clear()
+
+
+def solve(K, F, method='auto', cache=True):
+    """
+    Решает систему K U = F прямым методом для правой части F : shape=(n, )
+    или сразу для блока правых частей F : shape=(n, k)
+    (см. factorize)
+    """
+
+    return factorize(K, method, cache).solve(F)
+
+
+# Итерационные методы:
+
+def getPreconditioner(K, precond):
+    """
+    Возвращает функцию z = P(r) применения предобуславливателя к невязке r
+    
+    
+    Параметры
+    -------------
+    
+    K : np.array или scipy.sparse матрица
+        Матрица системы
+        
+    precond : str, callable, LinearOperator or None
+        'jacobi' - диагональный предобуславливатель
+        'block'  - блочно-диагональный с блоками 2x2 степеней свободы узлов
+        'ilu'    - неполное LU-разложение scipy.sparse.linalg.spilu
+        'direct' - точное разложение (см. factorize)
+        Функция или объект с методом matvec используются как есть,
+        None - без предобуславливания
+    """
+    
+    if precond is None:
+        return lambda r: r
+    if hasattr(precond, 'matvec'):
+        return precond.matvec
+    if callable(precond):
+        return precond
+    
+    if precond == 'jacobi':
+        invDiag = 1/K.diagonal()
+        return lambda r: invDiag*r
+    
+    if precond == 'block':
+        # Обращение блоков [[a, b], [c, d]] на диагонали матрицы:
+        a, d = K.diagonal()[0::2], K.diagonal()[1::2]
+        b, c = K.diagonal(1)[0::2], K.diagonal(-1)[0::2]
+        det = a*d - b*c
+        inv = np.stack((d, -b, -c, a), axis=-1).reshape(-1, 2, 2)/det[:, np.newaxis, np.newaxis]
+        return lambda r: np.einsum('nij,nj->ni', inv, r.reshape(-1, 2)).ravel()
+    
+    if precond == 'ilu':
+        ilu = sp.spilu(csc_matrix(K),
+                       drop_tol=1e-4, fill_factor=10, permc_spec='MMD_AT_PLUS_A',
+                       options=dict(SymmetricMode=True))
+        return ilu.solve
+    
+    if precond == 'direct':
+        return factorize(K).solve
+    
+    raise ValueError(f"Unknown preconditioner '{precond}'")
+
+
+class SolveInfo:
+    """
+    Класс для хранения информации о работе итерационного метода
+    
+    
+    Атрибуты
+    ------------
+    
+    converged : bool
+        Достигнута ли требуемая точность
+    iterations : int
+        Количество выполненных итераций
+    residuals : np.array(dtype=np.double)
+        История норм невязки ||F - K U|| (начиная с начального приближения)
+    """
+    
+    def __init__(self, converged, iterations, residuals):
+        self.converged = converged
+        self.iterations = iterations
+        self.residuals = np.asarray(residuals, dtype=np.double)
+        
+    def __repr__(self):
+        return f"SolveInfo(converged={self.converged}, iterations={self.iterations}, " \
+               f"residual={self.residuals[-1]:.3e})"
+
+
+def pcg(K, F, precond=None, x0=None, tol=1e-8, atol=0.0, maxiter=None, callback=None):
+    """
+    Решает систему K U = F с симметричной положительно определенной матрицей K
+    методом сопряженных градиентов с предобуславливанием
+    
+    
+    Параметры
+    -------------
+    
+    K : np.array, scipy.sparse матрица или LinearOperator
+        Матрица системы
+        
+    F : np.array(shape=(n, )) или np.array(shape=(n, k))
+        Правая часть (для блока правых частей каждый столбец решается отдельно)
+        
+    precond : optional
+        Предобуславливатель (см. getPreconditioner)
+        
+    x0 : np.array, optional
+        Начальное приближение (например, решение предыдущей задачи)
+        
+    tol, atol : float, optional
+        Итерации завершаются, если ||F - K U|| <= max(tol*||F||, atol)
+        
+    maxiter : int, optional
+        Максимальное количество итераций, по умолчанию 10n
+        
+    callback : callable, optional
+        Вызывается как callback(U) после каждой итерации
+        
+    Возвращает пару (U, info), где info - SolveInfo 
+    (или список SolveInfo для блока правых частей)
+    """
+    
+    F = np.asarray(F, dtype=np.double)
+    apply = getPreconditioner(K, precond)
+    
+    if F.ndim == 2:
+        U = np.empty_like(F)
+        infos = []
+        for j in range(F.shape[1]):
+            U[:, j], info = pcg(K, F[:, j], apply, None if x0 is None else x0[:, j],
+                                tol, atol, maxiter, callback)
+            infos.append(info)
+        return U, infos
+    
+    if maxiter is None:
+        maxiter = 10*F.shape[0]
+    
+    U = np.zeros_like(F) if x0 is None else np.array(x0, dtype=np.double)
+    r = F - K@U if x0 is not None else F.copy()
+    
+    bound = max(tol*np.linalg.norm(F), atol)
+    residuals = [np.linalg.norm(r)]
+    
+    z = apply(r)
+    p = z.copy()
+    rz = r@z
+    
+    iterations = 0
+    while residuals[-1] > bound and iterations < maxiter:
+        Kp = K@p
+        alpha = rz/(p@Kp)
+        U += alpha*p
+        r -= alpha*Kp
+        
+        iterations += 1
+        residuals.append(np.linalg.norm(r))
+        if callback is not None:
+            callback(U)
+        
+        z = apply(r)
+        rz, rzPrev = r@z, rz
+        p *= rz/rzPrev
+        p += z
+        
+    return U, SolveInfo(residuals[-1] <= bound, iterations, residuals)
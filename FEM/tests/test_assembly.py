@@ -0,0 +1,118 @@
+import numpy as np
+
+from concurrent.futures import ThreadPoolExecutor
+
+import FEM as fm
+from FEM.mesh import meshFrom
+
+
+mesh = meshFrom(name="doc/meshes/kirsch/s1.k")
+D = fm.getD(2e7, 0.25)
+
+
+class TestAssembly:
+    
+    def test_sparseK(self):
+        K = fm.getK(mesh, D)
+        Ks = fm.getK(mesh, D, sparse=True)
+        
+        assert Ks.format == 'csr', "sparse K should be in csr format"
+        assert np.allclose(Ks.toarray(), K, rtol=0.0, atol=1e-12*np.abs(K).max()), \
+               "sparse and dense K differ"
+               
+    def test_sparseM(self):
+        M = fm.getM(mesh, 2.0, 0.5)
+        Ms = fm.getM(mesh, 2.0, 0.5, sparse=True)
+        
+        assert np.allclose(Ms.toarray(), M), "sparse and dense M differ"
+        assert np.isclose(M.sum(), 2*2.0*0.5*mesh.S.sum()), "incorrect total mass"
+        
+    def test_sparseFix(self):
+        K, F = fm.getK(mesh, D), fm.getF(mesh)
+        Ks, Fs = fm.getK(mesh, D, sparse=True), fm.getF(mesh)
+        
+        for k, f in ((K, F), (Ks, Fs)):
+            fm.setFNeiman(mesh, f, 1e4, fm.vertBorder(9.0))
+            fm.fixAxis(mesh, k, f, 0, fm.vertBorder(0.0))
+            fm.fixAxis(mesh, k, f, 1, fm.horzBorder(0.0))
+            
+        assert np.allclose(Ks.toarray(), K, rtol=0.0, atol=1e-12*np.abs(K).max()), \
+               "fixAxis results for sparse and dense K differ"
+        assert np.allclose(Fs, F), "fixAxis results for F differ"
+        
+    def test_quadratures(self):
+        U = np.zeros(shape=(mesh.N, 2), dtype=np.double)
+        U[:, 0] = mesh.nodes[:, 0]
+        
+        for quadrature in fm.quadrature.QUADRATURES:
+            K = fm.getK(mesh, D, quadrature=quadrature, sparse=True)
+            
+            assert np.allclose(K@np.tile([1.0, 0.0], mesh.N), 0.0, atol=1e-6), \
+                   f"rigid translation is not free for '{quadrature}' quadrature"
+            assert np.isclose(U.ravel()@K@U.ravel(), D[0, 0]*mesh.S.sum()), \
+                   f"incorrect energy of uniform strain for '{quadrature}' quadrature"
+        
+    def test_factorsCache(self):
+        K1 = fm.getK(mesh, fm.getD(1e7, 0.3), sparse=True)
+        factors = fm.getStiffnessFactors(mesh, *fm.quadrature.QUADRATURES['corner'], sparse=True)
+        K2 = fm.getK(mesh, D, sparse=True)
+        
+        assert fm.getStiffnessFactors(mesh, *fm.quadrature.QUADRATURES['corner'], sparse=True) \
+               is factors, "stiffness factors are not cached"
+        assert np.allclose(K2.toarray(), fm.getK(mesh, D, sparse=True, cache=False).toarray()), \
+               "cached K differs from directly assembled one"
+        assert not np.allclose(K1.toarray(), K2.toarray()), "K does not depend on D"
+        
+        fm.getK(mesh, D)
+        assert all(factors.sparse for factors in mesh.stiffnessFactors.values()), \
+               "dense stiffness factors are cached by default"
+        
+    def test_parallel(self):
+        K = fm.getK(mesh, D, sparse=True, cache=False)
+        
+        for executor in ('thread', 'process'):
+            Kp = fm.getK(mesh, D, sparse=True, cache=False, workers=3, executor=executor)
+            assert np.allclose(Kp.toarray(), K.toarray()), \
+                   f"parallel assembly with '{executor}' executor differs from serial one"
+            
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            for workers in (2, 5):
+                Kp = fm.getK(mesh, D, sparse=True, cache=False, workers=workers, executor=pool)
+                assert np.allclose(Kp.toarray(), K.toarray()), \
+                       "parallel assembly in a shared pool differs from serial one"
+        
+    def test_neiman(self):
+        F = fm.getF(mesh)
+        fm.setFNeiman(mesh, F, 2.0, fm.vertBorder(9.0))
+        
+        assert np.isclose(F[0::2].sum(), 2.0*3.0), "incorrect total border load"
+        assert np.isclose(F[1::2].sum(), 0.0), "incorrect border load direction"
+        
+    def test_applyCP(self):
+        centers = mesh.nodes[mesh.cells].mean(axis=1)
+        values = np.stack((np.full(mesh.M, 2.0), centers[:, 0], centers[:, 1]**2), axis=-1)
+        
+        block = fm.applyCP(mesh, values)
+        assert block.shape == (mesh.N, 3), "incorrect shape of result"
+        assert np.allclose(block[:, 0], 2.0), "constant field is not reproduced"
+        
+        for j in range(3):
+            assert np.allclose(block[:, j], fm.applyCP(mesh, values[:, j], method='cg', tol=1e-12)), \
+                   "block solution differs from iterative one"
+        
+    def test_postprocessing(self):
+        U = np.random.default_rng(0).random(size=(2*mesh.N, 3))
+        strain, stress, principal, vonMises = fm.getCellsResults(mesh, U, D)
+        
+        for j in range(3):
+            expected = np.array([fm.getStrain(U[:, j].reshape(-1, 2)[cell], fm.getB(coords, S))
+                                 for cell, coords, S in zip(mesh.cells, mesh.coords, mesh.S)])
+            assert np.allclose(strain[:, :, j], expected), "incorrect block strains"
+            assert np.allclose(fm.getCellsStress(mesh, U[:, j], D), expected@D), \
+                   "incorrect stresses"
+        
+        sxx, syy, sxy = stress[:, 0], stress[:, 1], stress[:, 2]
+        assert np.allclose(principal.sum(axis=1), sxx + syy), "incorrect principal stresses"
+        assert np.allclose(principal.prod(axis=1), sxx*syy - sxy*sxy), "incorrect principal stresses"
+        assert np.allclose(vonMises**2, (principal**2).sum(axis=1) - principal.prod(axis=1)), \
+               "incorrect von Mises stress"
@@ -0,0 +1,58 @@
+import numpy as np
+import scipy.sparse.linalg as sp
+
+import FEM as fm
+from FEM.mesh import meshFrom
+
+
+mesh = meshFrom(name="doc/meshes/test.k")
+D = fm.getD(2e7, 0.25)
+
+isBorder = lambda a: np.isclose(np.abs(a).max(axis=-1), 1.0) | \
+                     np.isclose(np.linalg.norm(a, axis=-1), 0.25)
+linearU = lambda a: a@np.array([[1e-3, 2e-3], [-5e-4, 1e-3]])
+
+
+class TestConstraints:
+    
+    def test_patch(self):
+        constraints = fm.Constraints(mesh).fix(None, isBorder, linearU)
+        
+        Kf, Ff = constraints.reduce(fm.getK(mesh, D, sparse=True), fm.getF(mesh))
+        U = constraints.expand(sp.spsolve(Kf.tocsc(), Ff))
+        
+        assert Kf.shape[0] == 2*mesh.N - constraints.fixed.size, "incorrect reduced system"
+        assert np.allclose(U, linearU(mesh.nodes).ravel()), "patch test failed"
+        
+    def test_apply(self):
+        constraints = fm.Constraints(mesh).fix(1, fm.horzBorder(-1.0)) \
+                                          .fix(0, fm.vertBorder(-1.0)) \
+                                          .fix(0, fm.vertBorder( 1.0), 1e-3)
+        
+        K, F = fm.getK(mesh, D), fm.getF(mesh)
+        fm.setFNeiman(mesh, F, 1e4, fm.horzBorder(1.0))
+        
+        Kf, Ff = constraints.reduce(K, F)
+        U = constraints.expand(np.linalg.solve(Kf, Ff))
+        
+        constraints.apply(K, F)
+        assert np.allclose(np.linalg.solve(K, F), U), "reduce and apply results differ"
+        
+        Ks, Fs = fm.getK(mesh, D, sparse=True), fm.getF(mesh)
+        fm.setFNeiman(mesh, Fs, 1e4, fm.horzBorder(1.0))
+        fm.fixAxis(mesh, Ks, Fs, 1, fm.horzBorder(-1.0))
+        fm.fixAxis(mesh, Ks, Fs, 0, fm.vertBorder(-1.0))
+        fm.fixAxis(mesh, Ks, Fs, 0, fm.vertBorder( 1.0), 1e-3)
+        assert np.allclose(sp.spsolve(Ks.tocsc(), Fs), U), "fixAxis and reduce results differ"
+        
+    def test_selection(self):
+        rightHalf = lambda a: a[..., 0] > 0.5
+        constraints = fm.Constraints(mesh).fix(0, rightHalf)
+        
+        K, F = fm.getK(mesh, D), fm.getF(mesh)
+        fm.fixAxis(mesh, K, F, 0, rightHalf)
+        fixed = np.where(np.isclose(np.diag(K), 1.0) & (np.abs(K).sum(axis=-1) == 1.0))[0]
+        
+        assert (constraints.fixed == fixed).all(), "fix and fixAxis select different nodes"
+        assert (constraints.fixed//2 == mesh.getNodes(rightHalf)).all(), \
+               "predicate is not evaluated on border nodes only"
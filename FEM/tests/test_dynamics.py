@@ -0,0 +1,151 @@
+import numpy as np
+import pytest
+import scipy.linalg as la
+
+import FEM as fm
+from FEM.mesh import meshFrom
+
+
+mesh = meshFrom(name="doc/meshes/kirsch/s1.k")
+D = fm.getD(2e11, 0.3)
+rho, t = 7800.0, 0.01
+
+constraints = fm.Constraints(mesh).fix(None, fm.vertBorder(0.0))
+
+
+class TestModes:
+    
+    def test_constrained(self):
+        frequencies, shapes = fm.modes(mesh, D, rho, t, k=4, constraints=constraints)
+        
+        K = constraints.reduce(fm.getK(mesh, D)*t)
+        M = constraints.reduce(fm.getM(mesh, rho, t))
+        w2 = la.eigh(K, M, eigvals_only=True)[:4]
+        
+        assert np.allclose(frequencies, np.sqrt(w2)/(2*np.pi)), "incorrect frequencies"
+        assert np.allclose(shapes[constraints.fixed], 0.0), "constraints are violated"
+        assert np.allclose(shapes.T@fm.getM(mesh, rho, t)@shapes, np.eye(4)), \
+               "shapes are not mass-normalized"
+        
+    def test_free(self):
+        frequencies, _ = fm.modes(mesh, D, rho, t, k=4)
+        
+        assert np.allclose(frequencies[:3], 0.0, atol=1e-3), "rigid body modes are not found"
+        assert frequencies[3] > 1.0, "too many rigid body modes"
+        
+
+class TestExplicit:
+    
+    def test_lumped(self):
+        lumped = fm.getLumpedM(mesh, rho, t)
+        
+        assert np.allclose(lumped, fm.getM(mesh, rho, t).sum(axis=1)), \
+               "lumped mass differs from row sums of consistent mass"
+        assert np.allclose(fm.getM(mesh, rho, t, sparse=True, lumped=True).diagonal(), lumped), \
+               "incorrect lumped mass matrix"
+    
+    def test_centralDifference(self):
+        K, M = fm.getK(mesh, D, sparse=True)*t, fm.getLumpedM(mesh, rho, t)
+        frequencies, shapes = fm.modes(mesh, D, rho, t, k=1, constraints=constraints)
+        
+        dt = fm.criticalTimeStep(mesh, D, rho)
+        nsteps = int(1.5/(frequencies[0]*dt))
+        times, U, _ = fm.centralDifference(K, M, dt, nsteps, U0=1e-3*shapes[:, 0], 
+                                           fixed=constraints.fixed, every=5)
+        
+        tip = U[:, np.argmax(np.abs(shapes[:, 0]))]
+        crossings = times[np.where(np.diff(np.sign(tip)) != 0)[0]]
+        
+        assert np.abs(tip).max() <= 1.01*np.abs(tip[0]), "explicit scheme is unstable"
+        assert np.allclose(U[:, constraints.fixed], 0.0), "constraints are violated"
+        assert np.isclose(2*(crossings[-1] - crossings[0])/(len(crossings) - 1), 
+                          1/frequencies[0], rtol=0.02), "incorrect vibration period"
+        
+        times2, U2, _ = fm.centralDifference(K, M, None, nsteps, U0=1e-3*shapes[:, 0], 
+                                             fixed=constraints.fixed, every=5, 
+                                             mesh=mesh, D=D, rho=rho)
+        assert np.allclose(times2, times) and np.allclose(U2, U), "incorrect automatic time step"
+        
+        with pytest.warns(RuntimeWarning):
+            fm.centralDifference(K, M, 2*dt, 1, mesh=mesh, D=D, rho=rho)
+            
+        _, U, _ = fm.centralDifference(np.eye(2), np.ones(2), 0.1, 10, U0=[0.5, 0.0], 
+                                       V0=np.ones(2), fixed=[0])
+        assert U[-1, 0] == 0.5, "fixed DOF moves with initial velocity"
+        
+
+class TestNewmark:
+    
+    def test_vibration(self):
+        K, M = fm.getK(mesh, D, sparse=True)*t, fm.getM(mesh, rho, t, sparse=True)
+        frequencies, shapes = fm.modes(mesh, D, rho, t, k=1, constraints=constraints)
+        
+        integrator = fm.NewmarkIntegrator(K, M, 0.01/frequencies[0], constraints=constraints)
+        parts = list(integrator.run(250, U0=1e-3*shapes[:, 0], chunk=100))
+        
+        assert [len(part[0]) for part in parts] == [100, 100, 51], "incorrect history chunks"
+        
+        U = np.concatenate([part[1] for part in parts])
+        tip = U[:, np.argmax(np.abs(shapes[:, 0]))]
+        assert np.allclose(tip[[100, 200]], tip[0], rtol=1e-2), \
+               "incorrect vibration period or amplitude"
+        
+    def test_damped(self):
+        K, M = fm.getK(mesh, D, sparse=True)*t, fm.getM(mesh, rho, t, sparse=True)
+        frequencies, _ = fm.modes(mesh, D, rho, t, k=1, constraints=constraints)
+        
+        stretch = fm.Constraints(mesh).fix(None, fm.vertBorder(0.0)) \
+                                      .fix(0, fm.vertBorder(9.0), 1e-4)
+        Kf, Ff = stretch.reduce(K, fm.getF(mesh))
+        U = stretch.expand(fm.solve(Kf, Ff))
+        
+        integrator = fm.NewmarkIntegrator(K, M, 0.01/frequencies[0], alpha=-0.1,
+                                          C=K*(0.1/(2*np.pi*frequencies[0])), 
+                                          constraints=stretch)
+        *_, (_, history, _, _) = integrator.run(2000, chunk=500)
+        
+        assert np.allclose(history[-1], U, rtol=0.0, atol=1e-2*np.abs(U).max()), \
+               "damped solution does not reach static equilibrium"
+        
+
+class TestModalSolver:
+    
+    solver = fm.ModalSolver(mesh, D, rho, t, k=6, constraints=constraints, damping=0.05)
+    
+    def test_resonance(self):
+        M = fm.getM(mesh, rho, t, sparse=True)
+        w, z = 2*np.pi*self.solver.frequencies[0], self.solver.damping[0]
+        F = M@self.solver.shapes[:, 0]
+        
+        # Нагрузка возбуждает только первую форму, решение известно точно:
+        #   при F sin(wt) установившаяся амплитуда равна 1/(2 z w^2)
+        dt = 0.2/w
+        times, q, _ = self.solver.integrate(dt, 3000, F, lambda time: np.sin(w*time))
+        
+        assert np.allclose(q[:, 1:], 0.0, atol=1e-12), "modes are not decoupled"
+        assert np.isclose(np.abs(q[-300:, 0]).max(), 1/(2*z*w*w), rtol=1e-2), \
+               "incorrect resonance amplitude"
+        
+        U = self.solver.displacements(q[-3:])
+        assert np.allclose(U, np.outer(q[-3:, 0], self.solver.shapes[:, 0])), \
+               "incorrect displacements"
+        assert np.allclose(self.solver.displacements(q[-3:], nodes=[4, 7]), 
+                           U.reshape(3, -1, 2)[:, [4, 7]]), "incorrect nodal displacements"
+        
+    def test_newmark(self):
+        K, M = fm.getK(mesh, D, sparse=True)*t, fm.getM(mesh, rho, t, sparse=True)
+        w = 2*np.pi*self.solver.frequencies
+        U0 = self.solver.shapes@np.array([1e-3, 0, 5e-4, 0, 0, 0])
+        
+        # Демпфирование Рэлея, дающее те же коэффициенты damping для первой и третьей форм:
+        a, b = 2*0.05*w[0]*w[2]/(w[0] + w[2]), 2*0.05/(w[0] + w[2])
+        solver = fm.ModalSolver(mesh, D, rho, t, k=6, constraints=constraints,
+                                damping=(a/w + b*w)/2)
+        
+        dt = 0.05/w[0]
+        _, q, _ = solver.integrate(dt, 200, U0=U0, every=10)
+        integrator = fm.NewmarkIntegrator(K, M, dt/10, C=a*M + b*K, constraints=constraints)
+        *_, (_, U, _, _) = integrator.run(2000, U0=U0, every=100, chunk=4000)
+        
+        assert np.allclose(solver.displacements(q), U, atol=1e-3*np.abs(U0).max()), \
+               "modal solution differs from direct integration"
@@ -0,0 +1,33 @@
+import numpy as np
+
+import FEM as fm
+from FEM.mesh import meshFrom
+
+
+mesh = meshFrom(name="doc/meshes/test.k")
+mesh.computeCenters()
+
+
+class TestSPR:
+    
+    def test_linear(self):
+        values = np.stack((1 + 2*mesh.centers[:, 0] - 3*mesh.centers[:, 1], 
+                           np.full(mesh.M, 2.0)), axis=-1)
+        nodal = fm.applySPR(mesh, values)
+        
+        assert nodal.shape == (mesh.N, 2), "incorrect shape of result"
+        assert np.allclose(nodal[:, 0], 1 + 2*mesh.nodes[:, 0] - 3*mesh.nodes[:, 1]), \
+               "linear field is not reproduced"
+        assert np.allclose(fm.applySPR(mesh, values[:, 0]), nodal[:, 0]), \
+               "block recovery differs from single field one"
+        assert np.allclose(fm.getSPRError(mesh, values[:, 1]), 0.0), \
+               "nonzero error for constant field"
+        
+    def test_error(self):
+        f = lambda a: np.sin(2*a[:, 0])*a[:, 1]
+        errors = fm.getSPRError(mesh, f(mesh.centers))
+        
+        assert errors.shape == (mesh.M, ), "incorrect shape of error indicator"
+        assert np.abs(fm.applySPR(mesh, f(mesh.centers)) - f(mesh.nodes)).max() < \
+               np.abs(fm.applyCP(mesh, f(mesh.centers)) - f(mesh.nodes)).max(), \
+               "patch recovery is less accurate than consistent resultants"
@@ -0,0 +1,137 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+import FEM as fm
+from FEM.mesh import meshFrom
+
+
+mesh = meshFrom(name="doc/meshes/kirsch/s1.k")
+D = fm.getD(2e7, 0.25)
+
+
+def getSystem(k=None, sparse=True):
+    K, F = fm.getK(mesh, D, sparse=sparse), fm.getF(mesh, k)
+    fm.setFNeiman(mesh, F, 1e4 if k is None else 1e4*np.arange(1, k + 1), fm.vertBorder(9.0))
+    fm.fixAxis(mesh, K, F, 0, fm.vertBorder(0.0))
+    fm.fixAxis(mesh, K, F, 1, fm.horzBorder(0.0))
+    return K, F
+
+
+class TestDirectSolvers:
+    
+    def test_multiRHS(self):
+        K, F = getSystem(3)
+        U = fm.solve(K, F)
+        
+        assert U.shape == F.shape, "incorrect solution shape"
+        assert np.allclose(K@U, F), "incorrect solution"
+        assert np.allclose(U[:, 2], 3*U[:, 0]), "load cases are not independent"
+        
+        Kd, _ = getSystem(sparse=False)
+        assert np.allclose(fm.solve(Kd, F), U), "dense and sparse solutions differ"
+        
+    def test_cache(self):
+        K, F = getSystem()
+        factor = fm.factorize(K)
+        
+        assert fm.factorize(K) is factor, "factorization is not cached"
+        
+        fm.fixAxis(mesh, K, F, 1, fm.horzBorder(3.0))
+        assert fm.factorize(K) is not factor, "factorization of changed matrix is reused"
+        assert np.allclose(K@fm.solve(K, F), F), "incorrect solution of changed system"
+        
+
+class TestIterativeSolvers:
+    
+    def test_preconditioners(self):
+        K, F = getSystem()
+        U = fm.solve(K, F)
+        
+        _, plain = fm.pcg(K, F, tol=1e-10)
+        for precond in ('jacobi', 'block', 'ilu'):
+            Up, info = fm.pcg(K, F, precond, tol=1e-10)
+            
+            assert info.converged, f"pcg with '{precond}' preconditioner did not converge"
+            assert info.iterations == len(info.residuals) - 1, "incorrect residual history"
+            assert info.iterations <= plain.iterations, f"'{precond}' preconditioner slows down pcg"
+            assert np.allclose(Up, U, rtol=0.0, atol=1e-7*np.abs(U).max()), \
+                   f"incorrect solution with '{precond}' preconditioner"
+                   
+    def test_control(self):
+        K, F = getSystem()
+        U = fm.solve(K, F)
+        
+        _, info = fm.pcg(K, F, 'jacobi', maxiter=5)
+        assert not info.converged and info.iterations == 5, "maxiter is ignored"
+        
+        _, info = fm.pcg(K, F, 'jacobi', x0=U)
+        assert info.converged and info.iterations == 0, "warm start is ignored"
+            
+            
+class TestMultigrid:
+    
+    def test_vcycle(self):
+        iterations = []
+        for levels in (1, 2):
+            meshes, prolongations = fm.getHierarchy(mesh, levels)
+            fine = meshes[-1]
+            
+            F = fm.getF(fine)
+            fm.setFNeiman(fine, F, 1e4, fm.vertBorder(9.0))
+            constraints = fm.Constraints(fine).fix(0, fm.vertBorder(0.0)).fix(1, fm.horzBorder(0.0))
+            K, F = constraints.reduce(fm.getK(fine, D, sparse=True), F)
+            U = fm.solve(K, F)
+            
+            for smoother in ('jacobi', 'gauss-seidel'):
+                multigrid = fm.Multigrid(K, prolongations, constraints, smoother=smoother)
+                
+                Um, info = multigrid.solve(F, tol=1e-10)
+                assert info.converged and np.allclose(Um, U), f"{smoother} V-cycle does not converge"
+                
+                Up, info = fm.pcg(K, F, precond=multigrid, tol=1e-10)
+                assert info.converged and np.allclose(Up, U), f"{smoother} preconditioner fails"
+                iterations.append(info.iterations)
+                
+        assert max(iterations) <= 20, "too many iterations"
+        assert iterations[2] <= iterations[0] + 3, "iterations grow with refinement"
+
+
+class TestDecomposition:
+    
+    def test_schwarz(self):
+        F = fm.getF(mesh)
+        fm.setFNeiman(mesh, F, 1e4, fm.vertBorder(9.0))
+        constraints = fm.Constraints(mesh).fix(0, fm.vertBorder(0.0)).fix(1, fm.horzBorder(0.0))
+        K, F = constraints.reduce(fm.getK(mesh, D, sparse=True), F)
+        U = fm.solve(K, F)
+        
+        _, plain = fm.pcg(K, F, 'jacobi', tol=1e-10)
+        partition = mesh.partition(4)
+        
+        z = None
+        for workers, executor in ((None, 'process'), (2, 'thread'), (2, 'process')):
+            with fm.SchwarzPreconditioner(K, mesh, partition, constraints, 
+                                          workers=workers, executor=executor) as schwarz:
+                Up, info = fm.pcg(K, F, precond=schwarz, tol=1e-10)
+                
+                assert info.converged and np.allclose(Up, U), f"{executor} Schwarz preconditioner fails"
+                assert info.iterations < plain.iterations, "Schwarz preconditioner slows down pcg"
+                
+                if z is None:
+                    z = schwarz.matvec(F)
+                assert np.allclose(schwarz.matvec(F), z), f"{executor} workers change the result"
+
+    def test_schwarzFailure(self):
+        constraints = fm.Constraints(mesh).fix(0, fm.vertBorder(0.0)).fix(1, fm.horzBorder(0.0))
+        K, _ = constraints.reduce(fm.getK(mesh, D, sparse=True), fm.getF(mesh))
+        K = K.tolil()
+        K[0, :], K[:, 0] = 0.0, 0.0
+        partition = mesh.partition(4)
+        
+        for executor in ('thread', 'process'):
+            with pytest.raises(RuntimeError, match="singular"):
+                fm.SchwarzPreconditioner(K.tocsr(), mesh, partition, constraints, 
+                                         workers=2, executor=executor)
+        assert not multiprocessing.active_children(), "Workers outlive a failed constructor"